@@ -1,19 +1,42 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from datetime import datetime
+import io
+import logging
 import os
 
 from neo4j_connector import Neo4jConnector
 from data_processor import DataProcessor
 from visualizations import Visualizations
-from utils import format_currency, calculate_probability
+from utils import format_currency, format_currency_series
 
 # Get database connection credentials from environment variables (secrets)
 NEO4J_URI = os.environ.get("NEO4J_URI", "")
 NEO4J_USERNAME = os.environ.get("NEO4J_USERNAME", "")
 NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "")
+# Optional database name, the server's default database is used when unset
+NEO4J_DATABASE = os.environ.get("NEO4J_DATABASE") or None
+
+# Debug output from the data layer is enabled with LOG_LEVEL=DEBUG
+logging.basicConfig(level=getattr(
+    logging, os.environ.get("LOG_LEVEL", "WARNING").upper(), logging.WARNING))
+
+# User-friendly column names for the detailed table of all games
+DISPLAY_COLUMN_RENAMES = {
+    "game_id": "Game Number",
+    "game_number": "Game Number",
+    "formatted_game_name": "Game Name",
+    "game_name": "Game Name",
+    "ticket_price": "Ticket Price",
+    "total_prizes": "Total Prizes",
+    "prizes_claimed": "Prizes Claimed",
+    "percent_prizes_claimed": "Percent Claimed",
+    "expected_value": "Expected Value"
+}
 
 # Page configuration
 st.set_page_config(
@@ -23,13 +46,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Initialize session state for connection status
-if 'connected' not in st.session_state:
-    st.session_state.connected = False
-
 # Initialize session state for data
+# lottery_data stays None until the initial data has been loaded
 if 'lottery_data' not in st.session_state:
-    st.session_state.lottery_data = pd.DataFrame()
+    st.session_state.lottery_data = None
 
 if 'games_data' not in st.session_state:
     st.session_state.games_data = pd.DataFrame()
@@ -37,87 +57,662 @@ if 'games_data' not in st.session_state:
 if 'prizes_data' not in st.session_state:
     st.session_state.prizes_data = pd.DataFrame()
 
+if 'unique_games' not in st.session_state:
+    st.session_state.unique_games = []
 
-def main():
-    # Close any existing database connection when the app is restarted
-    if 'neo4j_connector' in st.session_state and hasattr(st.session_state.neo4j_connector, 'close'):
-        try:
-            st.session_state.neo4j_connector.close()
-        except:
-            pass  # Ignore errors during connection cleanup
-
-    # Automatically connect to the database using the secrets
-    if not st.session_state.connected:
-        try:
-            # Use the connection details from secrets
-            connector = Neo4jConnector(
-                NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-            st.session_state.neo4j_connector = connector
-
-            # Check connection
-            if connector.test_connection():
-                st.session_state.connected = True
-
-                # Load initial data
-                data_processor = DataProcessor(connector)
-                st.session_state.games_data = data_processor.get_all_games()
-                st.session_state.prizes_data = data_processor.get_all_prizes()
-                st.session_state.lottery_data = data_processor.get_combined_data()
+
+@st.cache_resource
+def get_connector(uri, username):
+    """
+    Get a Neo4j connector that is shared across reruns and sessions
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint
+    username : str
+        Neo4j username
+
+    Returns:
+    --------
+    Neo4jConnector
+        Connector to the Neo4j database
+    """
+    connector = Neo4jConnector(uri, username, NEO4J_PASSWORD, NEO4J_DATABASE)
+
+    # Raise instead of returning so that a failed connection is not cached
+    if not connector.test_connection():
+        connector.close()
+        raise ConnectionError(
+            "Failed to connect to the database. Please check your connection settings.")
+
+    return connector
+
+
+@st.cache_resource
+def get_processor(uri, username):
+    """
+    Get a data processor that is shared across reruns and sessions
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint
+    username : str
+        Neo4j username
+
+    Returns:
+    --------
+    DataProcessor
+        Data processor bound to the shared Neo4j connector
+    """
+    return DataProcessor(get_connector(uri, username))
+
+
+@st.cache_data(ttl=3600)
+def load_dashboard_data(uri):
+    """
+    Load games, prizes, combined data and games to avoid from a single query, cached so
+    that reruns do not query Neo4j again
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint, used as the cache key
+
+    Returns:
+    --------
+    tuple
+        Tuple of (games, prizes, combined, games_to_avoid) DataFrames
+    """
+    games_data, prizes_data, combined_data, games_to_avoid = get_processor(
+        uri, NEO4J_USERNAME).get_all_games_and_prizes()
+
+    # Ticket prices and game names come from a small set of values, so store them as categories
+    for col in ['ticket_price', 'game_name']:
+        if col in games_data.columns:
+            games_data[col] = games_data[col].astype('category')
+
+    return games_data, prizes_data, combined_data, games_to_avoid
+
+
+@st.cache_data(ttl=3600)
+def load_filtered_data(uri, min_ticket_price, max_ticket_price, ending_filter):
+    """
+    Load combined data filtered by ticket price, cached per filter so that revisiting a range does not query Neo4j again
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint, used as the cache key
+    min_ticket_price : float
+        Minimum ticket price for filtering Game nodes
+    max_ticket_price : float
+        Maximum ticket price for filtering Game nodes
+    ending_filter : str
+        Filter for games ending soon ('include', 'exclude', or 'only')
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Filtered DataFrame with calculated fields
+    """
+    return get_processor(uri, NEO4J_USERNAME).get_filtered_data(
+        game_id=None,  # No game filter
+        min_ticket_price=min_ticket_price,
+        max_ticket_price=max_ticket_price,
+        ending_filter=ending_filter
+    )
+
+
+@st.cache_data(ttl=3600)
+def load_summary_stats(uri):
+    """
+    Calculate the Dashboard Summary counts from the cached games data
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint, used as the cache key
+
+    Returns:
+    --------
+    dict
+        Dictionary with 'total_games' and 'games_ending_soon' counts
+    """
+    games_data = load_dashboard_data(uri)[0]
+    summary_stats = {
+        'total_games': 0,
+        'games_ending_soon': 0
+    }
+
+    if 'game_id' in games_data.columns:
+        summary_stats['total_games'] = games_data['game_id'].nunique(dropna=False)
+
+    # Count games where game_close_date is not NULL AND not empty string
+    if 'game_close_date' in games_data.columns:
+        close_dates = games_data['game_close_date']
+        summary_stats['games_ending_soon'] = int(
+            (close_dates.notna() & (close_dates != "")).sum())
+
+    return summary_stats
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_game_prize_details(uri, game_id):
+    """
+    Load prize details for a specific game, cached so that reselecting a game does not query Neo4j again
+
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint, used as the cache key
+    game_id : str
+        The game number to query prizes for
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame containing prize details for the specified game
+    """
+    return pd.DataFrame(get_connector(uri, NEO4J_USERNAME).get_game_prize_details(game_id))
+
+
+def get_unique_games(lottery_data):
+    """
+    Get the sorted list of game names shown in the Game Detail dropdown
+
+    Parameters:
+    -----------
+    lottery_data : pandas.DataFrame
+        DataFrame with combined game and prize information
+
+    Returns:
+    --------
+    list
+        Sorted list of unique game names
+    """
+    # Use formatted game names if available (these have the game number in parentheses)
+    if 'formatted_game_name' in lottery_data.columns:
+        name_col = 'formatted_game_name'
+    # If no formatted names available, use regular game names
+    elif 'game_name' in lottery_data.columns:
+        name_col = 'game_name'
+    else:
+        return []
+
+    # Sort inside pandas before taking the unique values
+    return lottery_data[name_col].sort_values().unique().tolist()
+
+
+def render_filters():
+    """
+    Render the ticket price filter and apply it to the lottery data when it changes
+    """
+    st.subheader("Filters")
+
+    # Store filter settings in session state to detect changes
+    if 'prev_filter_price_range' not in st.session_state:
+        st.session_state.prev_filter_price_range = (1, 100)
+
+    # Ticket Price filter from 1 to 100
+    selected_ticket_price_range = st.slider("Ticket Price ($)",
+                                            1, 100, (1, 100),
+                                            help="Filter games by ticket price")
+
+    # Removed "Games ending soon" filter as requested
+    # Default to "include all games" for backward compatibility
+    st.session_state.ending_filter = "include"
+
+    # Check if filters have changed
+    filters_changed = (selected_ticket_price_range !=
+                       st.session_state.prev_filter_price_range)
+
+    # Apply filters automatically when they change
+    if filters_changed:
+        # Apply ticket price filter only (no game filter)
+        min_ticket_price, max_ticket_price = selected_ticket_price_range
+
+        if (min_ticket_price, max_ticket_price) == (1, 100):
+            # The full range is the initial view, serve it from the cached combined data
+            st.session_state.lottery_data = load_dashboard_data(NEO4J_URI)[2]
+        else:
+            # Get filtered data, using the ending filter from session state
+            st.session_state.lottery_data = load_filtered_data(
+                NEO4J_URI, min_ticket_price, max_ticket_price,
+                st.session_state.ending_filter)
+        st.session_state.unique_games = get_unique_games(
+            st.session_state.lottery_data)
+
+        # Update the previous filter value
+        st.session_state.prev_filter_price_range = selected_ticket_price_range
+
+
+@st.fragment
+def render_game_detail():
+    """
+    Render the Game Detail View as a fragment so that selecting a game only reruns this block
+    """
+    # Default to include all games in case sidebar filter isn't accessible
+    ending_filter = "include"
+
+    # Try to get the sidebar filter value via session state
+    if 'ending_filter' in st.session_state:
+        ending_filter = st.session_state.ending_filter
+
+    # Add a game detail section for drill-down functionality
+    st.subheader("Game Detail View")
+    st.info(
+        "Select a specific game below to see detailed information about its prizes and distribution.")
+
+    # Dropdown to select a specific game to view details
+    # The game list is computed whenever lottery_data changes, not on every rerun
+    selected_detail_game = st.selectbox("Select a Game for Details", [
+                                        ""] + st.session_state.unique_games, index=0)
+
+    # Only proceed if a game was selected from the dropdown
+    if selected_detail_game:
+        game_detail_data = None  # Initialize variable to store game details
+        game_id = None  # Initialize game ID
+
+        # First try to extract the game number from the formatted name
+        # Formatted game names should follow the pattern "Game Name (game_number)"
+        _, paren, game_number = selected_detail_game.rpartition('(')
+        if paren and game_number.endswith(')') and game_number[:-1].isdigit():
+            game_id = game_number[:-1]
+
+        # If we have a Neo4j connector and a game ID, get the details from Neo4j
+        if game_id:
+            try:
+                # Fetch detailed prize information for this game
+                game_detail_data = load_game_prize_details(NEO4J_URI, game_id)
+            except Exception as e:
+                st.error(f"Error fetching game details: {str(e)}")
+
+        # If we couldn't get data from Neo4j or no game_id was found, fall back to filtering the dataframe
+        if game_detail_data is None or (hasattr(game_detail_data, 'empty') and game_detail_data.empty):
+            # First try to use the game ID to filter if available
+            if game_id and "game_id" in st.session_state.lottery_data.columns:
+                game_detail_data = st.session_state.lottery_data[
+                    st.session_state.lottery_data["game_id"] == game_id
+                ]
+            # Otherwise filter by name
+            elif 'formatted_game_name' in st.session_state.lottery_data.columns:
+                game_detail_data = st.session_state.lottery_data[
+                    st.session_state.lottery_data["formatted_game_name"] == selected_detail_game
+                ]
             else:
-                st.error(
-                    "Failed to connect to the database. Please check your connection settings.")
-        except Exception as e:
-            st.error(f"Connection error: {str(e)}")
+                game_detail_data = st.session_state.lottery_data[
+                    st.session_state.lottery_data["game_name"] == selected_detail_game
+                ]
+
+            # Rows from lottery_data are not ordered, sort by prize level (highest value prizes first)
+            if "prize_level" in game_detail_data.columns:
+                game_detail_data = game_detail_data.sort_values(
+                    "prize_level", ascending=False, kind="stable")
+
+        # Display the data if we have it
+        if game_detail_data is not None and not (hasattr(game_detail_data, 'empty') and game_detail_data.empty):
+
+            # Display basic game information
+            game_info_cols = st.columns([1, 2])
+
+            # Left column for metrics
+            with game_info_cols[0]:
+                if "ticket_price" in game_detail_data.columns:
+                    st.metric("Ticket Price", format_currency(
+                        game_detail_data["ticket_price"].iloc[0]))
+
+                total_prizes = 0
+                prizes_claimed = 0
+
+                # Get total prizes and prizes claimed
+                if "total_prizes" in game_detail_data.columns:
+                    total_prizes = game_detail_data["total_prizes"].iloc[0]
+                    st.metric("Total Prizes", f"{total_prizes:,}")
+                elif "total_count" in game_detail_data.columns:
+                    total_prizes = game_detail_data["total_count"].iloc[0]
+                    st.metric("Total Prizes", f"{total_prizes:,}")
+
+                if "prizes_claimed" in game_detail_data.columns:
+                    prizes_claimed = game_detail_data["prizes_claimed"].iloc[0]
+                    st.metric("Prizes Claimed", f"{prizes_claimed:,}")
+                elif "claimed_count" in game_detail_data.columns:
+                    prizes_claimed = game_detail_data["claimed_count"].iloc[0]
+                    st.metric("Prizes Claimed", f"{prizes_claimed:,}")
+
+            # Right column for pie chart
+            with game_info_cols[1]:
+                if total_prizes > 0:
+                    # Calculate prizes remaining
+                    prizes_remaining = total_prizes - prizes_claimed
+                    if prizes_remaining < 0:  # Handle data inconsistency
+                        prizes_remaining = 0
+
+                    # Create pie chart data
+                    pie_data = pd.DataFrame({
+                        'Status': ['Prizes Claimed', 'Prizes Remaining'],
+                        'Count': [prizes_claimed, prizes_remaining]
+                    })
+
+                    # Create pie chart
+                    fig = px.pie(
+                        pie_data,
+                        values='Count',
+                        names='Status',
+                        title=f"Prize Distribution for {selected_detail_game}",
+                        color='Status',
+                        color_discrete_map={
+                            'Prizes Claimed': 'red', 'Prizes Remaining': 'green'}
+                    )
+
+                    # Remove hover text but keep text inside pie chart sections
+                    fig.update_traces(
+                        textposition='inside',
+                        textinfo='percent+value',
+                        hoverinfo='skip'  # Skip hover info completely
+                    )
+
+                    # Display the pie chart with a stable key so the frontend updates it in place
+                    st.plotly_chart(fig, use_container_width=True,
+                                    key="detail_pie")
+
+            # Show a breakdown of prize levels by Detail nodes
+            st.markdown("#### Prize Breakdown")
+
+            # Process game detail data
+            if "prize_level" in game_detail_data.columns:
+                # Prize levels and detail counts are already numeric and sorted by prize level
+                # (highest value prizes first), the connector does both in Cypher
+
+                # Prepare prize breakdown data
+                prize_breakdown = pd.DataFrame()
+
+                # Prize Amount column (from prize_level)
+                if "prize_level" in game_detail_data.columns:
+                    prize_breakdown["Prize Amount"] = game_detail_data["prize_level"].copy(
+                    )
+                    # Format as currency
+                    prize_breakdown["Prize Amount"] = format_currency_series(
+                        prize_breakdown["Prize Amount"])
+
+                # Total Prizes column (from detail_total_prizes or detail_total_count)
+                if "detail_total_prizes" in game_detail_data.columns:
+                    prize_breakdown["Total Prizes"] = game_detail_data["detail_total_prizes"]
+                elif "detail_total_count" in game_detail_data.columns:
+                    prize_breakdown["Total Prizes"] = game_detail_data["detail_total_count"]
+
+                # Prizes Claimed column (from detail_prizes_claimed or detail_claimed_count)
+                if "detail_prizes_claimed" in game_detail_data.columns:
+                    prize_breakdown["Prizes Claimed"] = game_detail_data["detail_prizes_claimed"]
+                elif "detail_claimed_count" in game_detail_data.columns:
+                    prize_breakdown["Prizes Claimed"] = game_detail_data["detail_claimed_count"]
+
+                # Calculate remaining prizes
+                if "Total Prizes" in prize_breakdown.columns:
+                    # First, handle missing or null values in Prizes Claimed
+                    if "Prizes Claimed" not in prize_breakdown.columns:
+                        prize_breakdown["Prizes Claimed"] = 0
+                    else:
+                        # Make sure values are numeric and replace NA/null values with 0 in one pass
+                        prize_breakdown["Prizes Claimed"] = pd.to_numeric(
+                            prize_breakdown["Prizes Claimed"], errors='coerce').fillna(0).astype("int64")
+
+                    # Now calculate remaining prizes
+                    prize_breakdown["Prizes Remaining"] = prize_breakdown["Total Prizes"] - \
+                        prize_breakdown["Prizes Claimed"]
+
+                    # Calculate percent claimed from the numeric counts before they are formatted
+                    # Rows without any prizes are reported as 0% claimed
+                    total_prizes_numeric = prize_breakdown["Total Prizes"].to_numpy(
+                        dtype=float)
+                    prizes_claimed_numeric = prize_breakdown["Prizes Claimed"].to_numpy(
+                        dtype=float)
+                    percent_claimed_numeric = np.zeros(len(prize_breakdown))
+                    np.divide(prizes_claimed_numeric * 100, total_prizes_numeric,
+                              out=percent_claimed_numeric, where=total_prizes_numeric > 0)
+                    prize_breakdown["Percent Claimed Numeric"] = percent_claimed_numeric
+
+                    # Format numeric columns with comma separators
+                    prize_breakdown["Total Prizes"] = prize_breakdown["Total Prizes"].astype(
+                        int).map("{:,}".format)
+                    prize_breakdown["Prizes Claimed"] = prize_breakdown["Prizes Claimed"].astype(
+                        int).map("{:,}".format)
+                    prize_breakdown["Prizes Remaining"] = prize_breakdown["Prizes Remaining"].astype(
+                        int).map("{:,}".format)
+
+                    # Format percent claimed for display
+                    prize_breakdown["Percent Claimed"] = prize_breakdown["Percent Claimed Numeric"].map(
+                        "{:.2f}%".format)
+
+                    # Add color coding for the largest prize amount row if it exists
+                    if len(prize_breakdown) > 0:
+                        # Get the largest prize (first row)
+                        top_prize = prize_breakdown.iloc[0]
+                        percent_claimed = top_prize["Percent Claimed Numeric"]
+
+                        # Create a message about the top prize status
+                        top_prize_message = f"Top prize status: "
+                        if percent_claimed <= 25:
+                            top_prize_message += f"🟢 Good! Only {percent_claimed:.2f}% claimed"
+                            top_prize_color = "green"
+                        elif percent_claimed <= 75:
+                            top_prize_message += f"🟡 Moderate: {percent_claimed:.2f}% claimed"
+                            top_prize_color = "orange"
+                        else:
+                            top_prize_message += f"🔴 Limited: {percent_claimed:.2f}% claimed"
+                            top_prize_color = "red"
+
+                        # Display the top prize message with color
+                        st.markdown(
+                            f"<p style='color:{top_prize_color};font-weight:bold'>{top_prize_message}</p>", unsafe_allow_html=True)
+
+                    # Remove the numeric column before display
+                    prize_breakdown = prize_breakdown.drop(
+                        columns=["Percent Claimed Numeric"])
+
+                    # Display the dataframe
+                    st.dataframe(
+                        prize_breakdown, use_container_width=True, hide_index=True)
+                else:
+                    # If we don't have prize data, show the regular table
+                    st.dataframe(
+                        prize_breakdown, use_container_width=True, hide_index=True)
+
+
+def render_all_games_table():
+    """
+    Render the detailed table of all games in the filtered lottery data
+    """
+    # Bottom section with detailed table of all games
+    # Make it very clear this is information for ALL games
+    with st.expander("📊 ALL GAMES: Detailed Information Table", expanded=False):
+        st.info(
+            "This table shows combined information for all games in the database. Use this to compare games side-by-side.")
+        # Define what columns to show in the detailed table
+        # Use formatted_game_name if available, otherwise use game_name
+        name_col = "formatted_game_name" if "formatted_game_name" in st.session_state.lottery_data.columns else "game_name"
+
+        # Add specific columns for the table display, including game_id/game_number
+        id_col = None
+        if "game_id" in st.session_state.lottery_data.columns:
+            id_col = "game_id"
+        elif "game_number" in st.session_state.lottery_data.columns:
+            id_col = "game_number"
+
+        # Create the column list with game number first, then game name
+        detail_cols = []
+        if id_col:
+            detail_cols.append(id_col)  # Game ID/Number column
+        detail_cols.extend([name_col, "ticket_price", "total_prizes", "prizes_claimed",
+                            "percent_prizes_claimed", "expected_value"])
+
+        # Format the data for display, copying only the columns the table uses
+        display_source_cols = detail_cols + ["claimed_count", "total_count"]
+        display_data = st.session_state.lottery_data[
+            [col for col in display_source_cols if col in st.session_state.lottery_data.columns]].copy()
+
+        # Calculate percent_prizes_claimed as requested: (prizes_claimed/total_prizes)*100
+        # Handle missing or zero values in main game table too
+
+        # Try to use the prizes_claimed and total_prizes fields if available
+        if all(col in display_data.columns for col in ["prizes_claimed", "total_prizes"]):
+            # Ensure values are numeric and handle missing values
+            display_data["prizes_claimed"] = pd.to_numeric(
+                display_data["prizes_claimed"], errors='coerce').fillna(0)
+            display_data["total_prizes"] = pd.to_numeric(
+                display_data["total_prizes"], errors='coerce').fillna(0)
+
+            # Calculate percent, games without prizes count as 0% claimed
+            # The value stays numeric and st.dataframe formats it as a percentage
+            claimed_numeric = display_data["prizes_claimed"].to_numpy(
+                dtype=float)
+            total_numeric = display_data["total_prizes"].to_numpy(
+                dtype=float)
+            percent_claimed_numeric = np.zeros(len(display_data))
+            np.divide(claimed_numeric * 100, total_numeric,
+                      out=percent_claimed_numeric, where=total_numeric > 0)
+            display_data["percent_prizes_claimed"] = percent_claimed_numeric.round(
+                2)
+
+            # Format prizes_claimed and total_prizes with comma separators
+            display_data["prizes_claimed"] = display_data["prizes_claimed"].astype(
+                int).map("{:,}".format)
+            display_data["total_prizes"] = display_data["total_prizes"].astype(
+                int).map("{:,}".format)
+
+        # Fall back to claimed_count and total_count if needed
+        elif all(col in display_data.columns for col in ["claimed_count", "total_count"]):
+            # Ensure values are numeric and handle missing values
+            display_data["claimed_count"] = pd.to_numeric(
+                display_data["claimed_count"], errors='coerce').fillna(0)
+            display_data["total_count"] = pd.to_numeric(
+                display_data["total_count"], errors='coerce').fillna(0)
+
+            # Calculate percent, games without prizes count as 0% claimed
+            # The value stays numeric and st.dataframe formats it as a percentage
+            claimed_numeric = display_data["claimed_count"].to_numpy(
+                dtype=float)
+            total_numeric = display_data["total_count"].to_numpy(
+                dtype=float)
+            percent_claimed_numeric = np.zeros(len(display_data))
+            np.divide(claimed_numeric * 100, total_numeric,
+                      out=percent_claimed_numeric, where=total_numeric > 0)
+            display_data["percent_prizes_claimed"] = percent_claimed_numeric.round(
+                2)
+
+            # Format claimed_count and total_count with comma separators
+            display_data["claimed_count"] = display_data["claimed_count"].astype(
+                int).map("{:,}".format)
+            display_data["total_count"] = display_data["total_count"].astype(
+                int).map("{:,}".format)
+
+        # Sort the data by ticket price (numerically) before formatting
+        # ticket_price is already numeric, DataProcessor converts it when the data is loaded
+        if "ticket_price" in display_data.columns:
+            display_data = display_data.sort_values("ticket_price")
+            # Now format as currency for display
+            display_data["ticket_price"] = format_currency_series(
+                display_data["ticket_price"])
+
+        if "expected_value" in display_data.columns:
+            display_data["expected_value"] = format_currency_series(
+                display_data["expected_value"])
+
+        # Make sure the name and game ID/number columns are strings for display
+        for col in (name_col, id_col):
+            if col and col in display_data.columns:
+                display_data[col] = display_data[col].astype(str)
+
+        # Rename the columns to user-friendly names in a single pass
+        display_data = display_data.rename(
+            columns=DISPLAY_COLUMN_RENAMES)
+        available_cols = [DISPLAY_COLUMN_RENAMES.get(col, col) for col in detail_cols
+                          if DISPLAY_COLUMN_RENAMES.get(col, col) in display_data.columns]
+
+        # Show the detailed table with hidden row numbers
+        st.dataframe(display_data[available_cols],
+                     use_container_width=True, hide_index=True,
+                     column_config={
+                         "Percent Claimed": st.column_config.NumberColumn(format="%.2f%%")
+                     })
+
+        # Write the CSV with Arrow's columnar writer straight into an in-memory file,
+        # which the download button reads as bytes itself, so there is no separate
+        # conversion from an Arrow buffer to bytes here
+        csv_buffer = io.BytesIO()
+        pa_csv.write_csv(pa.Table.from_pandas(
+            display_data[available_cols], preserve_index=False), csv_buffer)
+        csv_buffer.seek(0)
+
+        # Add download button for the data
+        st.download_button(
+            label="Download Data as CSV",
+            data=csv_buffer,
+            file_name=f"texas_lottery_data_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+        )
+
+
+@st.fragment
+def render_filtered_view():
+    """
+    Render the ticket price filter with the sections that show the filtered data,
+    as a fragment so that moving the slider only reruns this block
+    """
+    render_filters()
+
+    render_game_detail()
+
+    # Add a clear visual separator
+    st.markdown("---")
+
+    render_all_games_table()
+
+
+def main():
+    # Connect to the database using the secrets; the connector is created once and shared
+    connected = False
+    try:
+        get_connector(NEO4J_URI, NEO4J_USERNAME)
+        connected = True
+    except ConnectionError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+
+    if connected:
+        # Games, prizes, combined data and games to avoid come from one cached query on every rerun
+        games_data, prizes_data, combined_data, _ = load_dashboard_data(NEO4J_URI)
+        st.session_state.games_data = games_data
+        st.session_state.prizes_data = prizes_data
+
+        # Load initial data once per session, the filters replace it afterwards
+        if st.session_state.lottery_data is None:
+            st.session_state.lottery_data = combined_data
+            st.session_state.unique_games = get_unique_games(
+                st.session_state.lottery_data)
 
     # Sidebar for filters
     with st.sidebar:
         # Title removed as requested
 
-        # Only show filters if connected
-        if st.session_state.connected and st.session_state.games_data is not None:
-            st.subheader("Filters")
-
-            # Store filter settings in session state to detect changes
-            if 'prev_filter_price_range' not in st.session_state:
-                st.session_state.prev_filter_price_range = (1, 100)
-
-            # Ticket Price filter from 1 to 100
-            selected_ticket_price_range = st.slider("Ticket Price ($)",
-                                                    1, 100, (1, 100),
-                                                    help="Filter games by ticket price")
-
-            # Removed "Games ending soon" filter as requested
-            # Default to "include all games" for backward compatibility
-            st.session_state.ending_filter = "include"
-
-            # Check if filters have changed
-            filters_changed = (selected_ticket_price_range !=
-                               st.session_state.prev_filter_price_range)
-
-            # Apply filters automatically when they change
-            if filters_changed:
-                data_processor = DataProcessor(
-                    st.session_state.neo4j_connector)
-
-                # Apply ticket price filter only (no game filter)
-                min_ticket_price, max_ticket_price = selected_ticket_price_range
-
-                # Get filtered data
-                st.session_state.lottery_data = data_processor.get_filtered_data(
-                    game_id=None,  # No game filter
-                    min_ticket_price=min_ticket_price,
-                    max_ticket_price=max_ticket_price,
-                    # Use the ending filter from session state
-                    ending_filter=st.session_state.ending_filter
-                )
-
-                # Update the previous filter value
-                st.session_state.prev_filter_price_range = selected_ticket_price_range
+        # Drop the cached data and reload it from the database, rerunning the whole app
+        if connected and st.button("Refresh Data", help="Reload the latest data from the database"):
+            load_dashboard_data.clear()
+            load_filtered_data.clear()
+            load_summary_stats.clear()
+            load_game_prize_details.clear()
+            get_connector(NEO4J_URI, NEO4J_USERNAME).invalidate()
+            st.session_state.lottery_data = None
+            # Reapply the current filter to the reloaded data
+            st.session_state.prev_filter_price_range = (1, 100)
+            st.rerun()
 
     # Main dashboard area
     st.title("Texas Lottery Scratchoff Analysis Dashboard")
 
-    if not st.session_state.connected:
+    if not connected:
         st.info(
             "Please connect to the Neo4j database using the sidebar to view the dashboard.")
 
@@ -174,34 +769,21 @@ def main():
 
             metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
 
+            # Count-based metrics are computed together in one cached pass over games_data
+            summary_stats = load_summary_stats(NEO4J_URI)
+
             with metrics_col1:
-                if "game_id" in st.session_state.games_data.columns:
-                    total_games = len(
-                        st.session_state.games_data["game_id"].unique())
-                    st.metric("Total Games", total_games)
-                else:
-                    st.metric("Total Games", 0)
+                st.metric("Total Games", summary_stats["total_games"])
 
             with metrics_col2:
                 # Games ending soon: count of Game nodes with a non-null/non-empty game_close_date
-                if "game_close_date" in st.session_state.games_data.columns:
-                    # Count games where game_close_date is not NULL AND not empty string
-                    games_ending_soon_data = st.session_state.games_data[
-                        st.session_state.games_data["game_close_date"].notna() &
-                        (st.session_state.games_data["game_close_date"] != "")
-                    ]
-                    games_ending_soon_count = games_ending_soon_data.shape[0]
-                    st.metric("Games Ending Soon", games_ending_soon_count)
-                else:
-                    st.metric("Games Ending Soon", 0)
+                st.metric("Games Ending Soon", summary_stats["games_ending_soon"])
 
             with metrics_col3:
                 # Games to Avoid (90%+ top prizes claimed)
                 try:
-                    # Get the list of games to avoid from Neo4j
-                    data_processor = DataProcessor(
-                        st.session_state.neo4j_connector)
-                    games_to_avoid_df = data_processor.get_games_to_avoid()
+                    # Get the list of games to avoid from the cached dashboard data
+                    games_to_avoid_df = load_dashboard_data(NEO4J_URI)[3]
                     games_to_avoid_count = len(
                         games_to_avoid_df) if not games_to_avoid_df.empty else 0
                     st.metric("Games to Avoid", games_to_avoid_count,
@@ -221,15 +803,15 @@ def main():
             if "ticket_price" in st.session_state.games_data.columns:
                 # Group games by ticket price and count
                 ticket_price_counts = st.session_state.games_data.groupby(
-                    "ticket_price").size().reset_index(name="count")
+                    "ticket_price", observed=True).size().reset_index(name="count")
                 ticket_price_counts = ticket_price_counts.sort_values(
                     by="ticket_price")
 
                 # Format ticket prices as currency
-                ticket_price_counts["ticket_price_formatted"] = ticket_price_counts["ticket_price"].apply(
-                    # No cents display for cleaner labels
-                    lambda x: f"${float(x):.0f}"
-                )
+                # No cents display for cleaner labels
+                ticket_price_counts["ticket_price_formatted"] = "$" + \
+                    ticket_price_counts["ticket_price"].astype(
+                        float).round(0).astype(int).astype(str)
 
                 # Create a bar chart using plotly
                 fig = px.bar(
@@ -268,7 +850,9 @@ def main():
                     yaxis_title="Number of Games"
                 )
 
-                st.plotly_chart(fig, use_container_width=True)
+                # Stable key so reruns update the existing chart in place
+                st.plotly_chart(fig, use_container_width=True,
+                                key="price_bar")
             else:
                 st.info("Ticket price data not available")
 
@@ -283,25 +867,25 @@ def main():
 
                 # Format numeric columns
                 if 'prize_level' in display_df.columns:
-                    display_df['Top Prize'] = display_df['prize_level'].apply(
-                        format_currency)
+                    display_df['Top Prize'] = format_currency_series(
+                        display_df['prize_level'])
 
                 if 'ticket_price' in display_df.columns:
-                    display_df['Ticket Price'] = display_df['ticket_price'].apply(
-                        lambda x: f"${float(x):.2f}")
+                    display_df['Ticket Price'] = "$" + \
+                        display_df['ticket_price'].astype(
+                            float).map("{:.2f}".format)
 
                 if 'claim_rate' in display_df.columns:
-                    display_df['Claim Rate'] = display_df['claim_rate'].apply(
-                        lambda x: f"{float(x)*100:.1f}%")
+                    display_df['Claim Rate'] = (
+                        display_df['claim_rate'].astype(float) * 100).map("{:.1f}%".format)
 
                 # Use formatted game name if available, otherwise format it here
                 if 'formatted_game_name' in display_df.columns:
                     display_df = display_df.rename(
                         columns={'formatted_game_name': 'Game'})
                 elif all(col in display_df.columns for col in ['game_name', 'game_id']):
-                    display_df['Game'] = display_df.apply(
-                        lambda row: f"{row['game_name']} ({row['game_id']})", axis=1
-                    )
+                    display_df['Game'] = display_df['game_name'].astype(str) + \
+                        " (" + display_df['game_id'].astype(str) + ")"
                 elif 'game_name' in display_df.columns:
                     display_df = display_df.rename(
                         columns={'game_name': 'Game'})
@@ -318,414 +902,8 @@ def main():
                 st.dataframe(display_df[cols_to_display],
                              hide_index=True, use_container_width=True)
 
-            # Default to include all games in case sidebar filter isn't accessible
-            ending_filter = "include"
-
-            # Try to get the sidebar filter value via session state
-            if 'ending_filter' in st.session_state:
-                ending_filter = st.session_state.ending_filter
-
-            # Add a game detail section for drill-down functionality
-            st.subheader("Game Detail View")
-            st.info(
-                "Select a specific game below to see detailed information about its prizes and distribution.")
-
-            # Dropdown to select a specific game to view details
-            if 'formatted_game_name' in st.session_state.lottery_data.columns:
-                # Use formatted game names if available (these have the game number in parentheses)
-                unique_games = sorted(
-                    st.session_state.lottery_data["formatted_game_name"].unique())
-                selected_detail_game = st.selectbox("Select a Game for Details", [
-                                                    ""] + unique_games, index=0)
-            elif "game_name" in st.session_state.lottery_data.columns:
-                # If no formatted names available, use regular game names
-                unique_games = sorted(
-                    st.session_state.lottery_data["game_name"].unique())
-                selected_detail_game = st.selectbox("Select a Game for Details", [
-                                                    ""] + unique_games, index=0)
-
-            # Only proceed if a game was selected from the dropdown
-            if selected_detail_game:
-                game_detail_data = None  # Initialize variable to store game details
-                game_id = None  # Initialize game ID
-
-                # First try to extract the game number from the formatted name
-                # Formatted game names should follow the pattern "Game Name (game_number)"
-                import re
-                game_number_match = re.search(
-                    r'\((\d+)\)$', selected_detail_game)
-                if game_number_match:
-                    game_id = game_number_match.group(1)
-
-                # If we have a Neo4j connector and a game ID, get the details from Neo4j
-                if 'neo4j_connector' in st.session_state and game_id:
-                    try:
-                        # Fetch detailed prize information for this game
-                        prize_details = st.session_state.neo4j_connector.get_game_prize_details(
-                            game_id)
-                        game_detail_data = pd.DataFrame(prize_details)
-                    except Exception as e:
-                        st.error(f"Error fetching game details: {str(e)}")
-
-                # If we couldn't get data from Neo4j or no game_id was found, fall back to filtering the dataframe
-                if game_detail_data is None or (hasattr(game_detail_data, 'empty') and game_detail_data.empty):
-                    # First try to use the game ID to filter if available
-                    if game_id and "game_id" in st.session_state.lottery_data.columns:
-                        game_detail_data = st.session_state.lottery_data[
-                            st.session_state.lottery_data["game_id"] == game_id
-                        ]
-                    # Otherwise filter by name
-                    elif 'formatted_game_name' in st.session_state.lottery_data.columns:
-                        game_detail_data = st.session_state.lottery_data[
-                            st.session_state.lottery_data["formatted_game_name"] == selected_detail_game
-                        ]
-                    else:
-                        game_detail_data = st.session_state.lottery_data[
-                            st.session_state.lottery_data["game_name"] == selected_detail_game
-                        ]
-
-                # Display the data if we have it
-                if game_detail_data is not None and not (hasattr(game_detail_data, 'empty') and game_detail_data.empty):
-
-                    # Display basic game information
-                    game_info_cols = st.columns([1, 2])
-
-                    # Left column for metrics
-                    with game_info_cols[0]:
-                        if "ticket_price" in game_detail_data.columns:
-                            st.metric("Ticket Price", format_currency(
-                                game_detail_data["ticket_price"].iloc[0]))
-
-                        total_prizes = 0
-                        prizes_claimed = 0
-
-                        # Get total prizes and prizes claimed
-                        if "total_prizes" in game_detail_data.columns:
-                            total_prizes = game_detail_data["total_prizes"].iloc[0]
-                            st.metric("Total Prizes", f"{total_prizes:,}")
-                        elif "total_count" in game_detail_data.columns:
-                            total_prizes = game_detail_data["total_count"].iloc[0]
-                            st.metric("Total Prizes", f"{total_prizes:,}")
-
-                        if "prizes_claimed" in game_detail_data.columns:
-                            prizes_claimed = game_detail_data["prizes_claimed"].iloc[0]
-                            st.metric("Prizes Claimed", f"{prizes_claimed:,}")
-                        elif "claimed_count" in game_detail_data.columns:
-                            prizes_claimed = game_detail_data["claimed_count"].iloc[0]
-                            st.metric("Prizes Claimed", f"{prizes_claimed:,}")
-
-                    # Right column for pie chart
-                    with game_info_cols[1]:
-                        if total_prizes > 0:
-                            # Calculate prizes remaining
-                            prizes_remaining = total_prizes - prizes_claimed
-                            if prizes_remaining < 0:  # Handle data inconsistency
-                                prizes_remaining = 0
-
-                            # Create pie chart data
-                            pie_data = pd.DataFrame({
-                                'Status': ['Prizes Claimed', 'Prizes Remaining'],
-                                'Count': [prizes_claimed, prizes_remaining]
-                            })
-
-                            # Create pie chart
-                            fig = px.pie(
-                                pie_data,
-                                values='Count',
-                                names='Status',
-                                title=f"Prize Distribution for {selected_detail_game}",
-                                color='Status',
-                                color_discrete_map={
-                                    'Prizes Claimed': 'red', 'Prizes Remaining': 'green'}
-                            )
-
-                            # Remove hover text but keep text inside pie chart sections
-                            fig.update_traces(
-                                textposition='inside',
-                                textinfo='percent+value',
-                                hoverinfo='skip'  # Skip hover info completely
-                            )
-
-                            # Display the pie chart
-                            st.plotly_chart(fig, use_container_width=True)
-
-                    # Show a breakdown of prize levels by Detail nodes
-                    st.markdown("#### Prize Breakdown")
-
-                    # Process game detail data
-                    if "prize_level" in game_detail_data.columns:
-                        # Make sure numeric columns are numeric
-                        numeric_columns = [
-                            "prize_level", "detail_total_prizes", "detail_prizes_claimed"]
-                        for col in numeric_columns:
-                            if col in game_detail_data.columns:
-                                game_detail_data[col] = pd.to_numeric(
-                                    game_detail_data[col], errors="coerce")
-
-                        # Sort by prize level (highest value prizes first)
-                        if "prize_level" in game_detail_data.columns:
-                            game_detail_data = game_detail_data.sort_values(
-                                "prize_level", ascending=False)
-
-                        # Prepare prize breakdown data
-                        prize_breakdown = pd.DataFrame()
-
-                        # Prize Amount column (from prize_level)
-                        if "prize_level" in game_detail_data.columns:
-                            prize_breakdown["Prize Amount"] = game_detail_data["prize_level"].copy(
-                            )
-                            # Format as currency
-                            prize_breakdown["Prize Amount"] = prize_breakdown["Prize Amount"].apply(
-                                format_currency)
-
-                        # Total Prizes column (from detail_total_prizes or detail_total_count)
-                        if "detail_total_prizes" in game_detail_data.columns:
-                            prize_breakdown["Total Prizes"] = game_detail_data["detail_total_prizes"]
-                        elif "detail_total_count" in game_detail_data.columns:
-                            prize_breakdown["Total Prizes"] = game_detail_data["detail_total_count"]
-
-                        # Prizes Claimed column (from detail_prizes_claimed or detail_claimed_count)
-                        if "detail_prizes_claimed" in game_detail_data.columns:
-                            prize_breakdown["Prizes Claimed"] = game_detail_data["detail_prizes_claimed"]
-                        elif "detail_claimed_count" in game_detail_data.columns:
-                            prize_breakdown["Prizes Claimed"] = game_detail_data["detail_claimed_count"]
-
-                        # Calculate remaining prizes
-                        if "Total Prizes" in prize_breakdown.columns:
-                            # First, handle missing or null values in Prizes Claimed
-                            if "Prizes Claimed" not in prize_breakdown.columns:
-                                prize_breakdown["Prizes Claimed"] = 0
-                            else:
-                                # Replace NA/null values with 0
-                                prize_breakdown["Prizes Claimed"] = prize_breakdown["Prizes Claimed"].fillna(
-                                    0)
-                                # Make sure values are numeric
-                                prize_breakdown["Prizes Claimed"] = pd.to_numeric(
-                                    prize_breakdown["Prizes Claimed"], errors='coerce').fillna(0)
-
-                            # Now calculate remaining prizes
-                            prize_breakdown["Prizes Remaining"] = prize_breakdown["Total Prizes"] - \
-                                prize_breakdown["Prizes Claimed"]
-
-                            # Format numeric columns with comma separators
-                            prize_breakdown["Total Prizes"] = prize_breakdown["Total Prizes"].apply(
-                                lambda x: f"{int(x):,}")
-                            prize_breakdown["Prizes Claimed"] = prize_breakdown["Prizes Claimed"].apply(
-                                lambda x: f"{int(x):,}")
-                            prize_breakdown["Prizes Remaining"] = prize_breakdown["Prizes Remaining"].apply(
-                                lambda x: f"{int(x):,}")
-
-                            # Calculate percent claimed as a numeric column first
-                            # Handle division by zero by using numpy to set those cases to 0%
-                            # Store original values before replacing with formatted ones
-                            total_prizes_numeric = pd.to_numeric(
-                                prize_breakdown["Total Prizes"].str.replace(',', ''), errors='coerce')
-                            prizes_claimed_numeric = pd.to_numeric(
-                                prize_breakdown["Prizes Claimed"].str.replace(',', ''), errors='coerce')
-
-                            prize_breakdown["Percent Claimed Numeric"] = (
-                                prizes_claimed_numeric / total_prizes_numeric) * 100
-                            # Replace any NaN values (from division by zero) with 0
-                            prize_breakdown["Percent Claimed Numeric"] = prize_breakdown["Percent Claimed Numeric"].fillna(
-                                0)
-
-                            # Format percent claimed for display
-                            prize_breakdown["Percent Claimed"] = prize_breakdown["Percent Claimed Numeric"].apply(
-                                lambda x: f"{x:.2f}%")
-
-                            # Add color coding for the largest prize amount row if it exists
-                            if len(prize_breakdown) > 0:
-                                # Get the largest prize (first row)
-                                top_prize = prize_breakdown.iloc[0]
-                                percent_claimed = top_prize["Percent Claimed Numeric"]
-
-                                # Create a message about the top prize status
-                                top_prize_message = f"Top prize status: "
-                                if percent_claimed <= 25:
-                                    top_prize_message += f"🟢 Good! Only {percent_claimed:.2f}% claimed"
-                                    top_prize_color = "green"
-                                elif percent_claimed <= 75:
-                                    top_prize_message += f"🟡 Moderate: {percent_claimed:.2f}% claimed"
-                                    top_prize_color = "orange"
-                                else:
-                                    top_prize_message += f"🔴 Limited: {percent_claimed:.2f}% claimed"
-                                    top_prize_color = "red"
-
-                                # Display the top prize message with color
-                                st.markdown(
-                                    f"<p style='color:{top_prize_color};font-weight:bold'>{top_prize_message}</p>", unsafe_allow_html=True)
-
-                            # Remove the numeric column before display
-                            prize_breakdown = prize_breakdown.drop(
-                                columns=["Percent Claimed Numeric"])
-
-                            # Display the dataframe
-                            st.dataframe(
-                                prize_breakdown, use_container_width=True, hide_index=True)
-                        else:
-                            # If we don't have prize data, show the regular table
-                            st.dataframe(
-                                prize_breakdown, use_container_width=True, hide_index=True)
-
-            # Add a clear visual separator
-            st.markdown("---")
-
-            # Bottom section with detailed table of all games
-            # Make it very clear this is information for ALL games
-            with st.expander("📊 ALL GAMES: Detailed Information Table", expanded=False):
-                st.info(
-                    "This table shows combined information for all games in the database. Use this to compare games side-by-side.")
-                # Define what columns to show in the detailed table
-                # Use formatted_game_name if available, otherwise use game_name
-                name_col = "formatted_game_name" if "formatted_game_name" in st.session_state.lottery_data.columns else "game_name"
-
-                # Add specific columns for the table display, including game_id/game_number
-                id_col = None
-                if "game_id" in st.session_state.lottery_data.columns:
-                    id_col = "game_id"
-                elif "game_number" in st.session_state.lottery_data.columns:
-                    id_col = "game_number"
-
-                # Create the column list with game number first, then game name
-                detail_cols = []
-                if id_col:
-                    detail_cols.append(id_col)  # Game ID/Number column
-                detail_cols.extend([name_col, "ticket_price", "total_prizes", "prizes_claimed",
-                                    "percent_prizes_claimed", "expected_value"])
-
-                # Format the data for display
-                display_data = st.session_state.lottery_data.copy()
-
-                # Calculate percent_prizes_claimed as requested: (prizes_claimed/total_prizes)*100
-                # Handle missing or zero values in main game table too
-
-                # Try to use the prizes_claimed and total_prizes fields if available
-                if all(col in display_data.columns for col in ["prizes_claimed", "total_prizes"]):
-                    # Ensure values are numeric and handle missing values
-                    display_data["prizes_claimed"] = pd.to_numeric(
-                        display_data["prizes_claimed"], errors='coerce').fillna(0)
-                    display_data["total_prizes"] = pd.to_numeric(
-                        display_data["total_prizes"], errors='coerce').fillna(0)
-
-                    # Calculate percent
-                    display_data["percent_prizes_claimed"] = (
-                        display_data["prizes_claimed"] / display_data["total_prizes"]) * 100
-                    # Replace any NaN with 0
-                    display_data["percent_prizes_claimed"] = display_data["percent_prizes_claimed"].fillna(
-                        0)
-                    display_data["percent_prizes_claimed"] = display_data["percent_prizes_claimed"].apply(
-                        lambda x: f"{x:.2f}%")
-
-                    # Format prizes_claimed and total_prizes with comma separators
-                    display_data["prizes_claimed"] = display_data["prizes_claimed"].apply(
-                        lambda x: f"{int(x):,}")
-                    display_data["total_prizes"] = display_data["total_prizes"].apply(
-                        lambda x: f"{int(x):,}")
-
-                # Fall back to claimed_count and total_count if needed
-                elif all(col in display_data.columns for col in ["claimed_count", "total_count"]):
-                    # Ensure values are numeric and handle missing values
-                    display_data["claimed_count"] = pd.to_numeric(
-                        display_data["claimed_count"], errors='coerce').fillna(0)
-                    display_data["total_count"] = pd.to_numeric(
-                        display_data["total_count"], errors='coerce').fillna(0)
-
-                    # Calculate percent
-                    display_data["percent_prizes_claimed"] = (
-                        display_data["claimed_count"] / display_data["total_count"]) * 100
-                    # Replace any NaN with 0
-                    display_data["percent_prizes_claimed"] = display_data["percent_prizes_claimed"].fillna(
-                        0)
-                    display_data["percent_prizes_claimed"] = display_data["percent_prizes_claimed"].apply(
-                        lambda x: f"{x:.2f}%")
-
-                    # Format claimed_count and total_count with comma separators
-                    display_data["claimed_count"] = display_data["claimed_count"].apply(
-                        lambda x: f"{int(x):,}")
-                    display_data["total_count"] = display_data["total_count"].apply(
-                        lambda x: f"{int(x):,}")
-
-                # Sort the data by ticket price (numerically) before formatting
-                if "ticket_price" in display_data.columns:
-                    # Convert to numeric first to ensure proper sorting
-                    display_data["ticket_price"] = pd.to_numeric(
-                        display_data["ticket_price"], errors="coerce")
-                    # Now sort the dataframe by ticket price
-                    display_data = display_data.sort_values("ticket_price")
-                    # Now format as currency for display
-                    display_data["ticket_price"] = display_data["ticket_price"].apply(
-                        format_currency)
-
-                if "expected_value" in display_data.columns:
-                    display_data["expected_value"] = display_data["expected_value"].apply(
-                        format_currency)
-
-                # Make sure available_cols is defined
-                available_cols = [
-                    col for col in detail_cols if col in display_data.columns]
-
-                # Make sure name column is a string for display
-                if name_col in display_data.columns:
-                    # Convert the name column to strings (if not already)
-                    display_data[name_col] = display_data[name_col].astype(str)
-
-                    # Rename the column to "Game Name" for display
-                    display_data = display_data.rename(
-                        columns={name_col: "Game Name"})
-
-                    # Update the column name in available_cols
-                    if name_col in available_cols:
-                        index = available_cols.index(name_col)
-                        available_cols[index] = "Game Name"
-
-                # Also make sure game ID/number column is properly formatted
-                if id_col and id_col in display_data.columns:
-                    # Convert the ID column to strings for display
-                    display_data[id_col] = display_data[id_col].astype(str)
-
-                    # Rename the column to a more user-friendly name for display
-                    if id_col == "game_id":
-                        display_data = display_data.rename(
-                            columns={"game_id": "Game Number"})
-                    elif id_col == "game_number":
-                        display_data = display_data.rename(
-                            columns={"game_number": "Game Number"})
-
-                    # Update the column name in the available_cols list
-                    if id_col in available_cols:
-                        index = available_cols.index(id_col)
-                        available_cols[index] = "Game Number"
-
-                # Rename other columns to be more user-friendly before display
-                column_renames = {
-                    "ticket_price": "Ticket Price",
-                    "total_prizes": "Total Prizes",
-                    "prizes_claimed": "Prizes Claimed",
-                    "percent_prizes_claimed": "Percent Claimed",
-                    "expected_value": "Expected Value"
-                }
-
-                # Apply the renames to both the DataFrame and the column list
-                for old_name, new_name in column_renames.items():
-                    if old_name in display_data.columns:
-                        display_data = display_data.rename(
-                            columns={old_name: new_name})
-                    if old_name in available_cols:
-                        index = available_cols.index(old_name)
-                        available_cols[index] = new_name
-
-                # Show the detailed table with hidden row numbers
-                st.dataframe(display_data[available_cols],
-                             use_container_width=True, hide_index=True)
-
-                # Add download button for the data
-                st.download_button(
-                    label="Download Data as CSV",
-                    data=display_data[available_cols].to_csv(
-                        index=False).encode('utf-8'),
-                    file_name=f"texas_lottery_data_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                )
+            # The filter and the sections that show the filtered data rerun on their own
+            render_filtered_view()
 
 
 def add_kofi_widget():
@@ -2,6 +2,15 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from utils import calculate_expected_value_array, calculate_probability_array
+
+# Prize count columns, stored as integers when every value converts cleanly
+COUNT_COLUMNS = {'prize_level', 'total_prizes', 'prizes_claimed',
+                 'total_count', 'claimed_count', 'remaining_count'}
+
+# Queries return each count once, the analysis also reads them under these names
+COUNT_ALIASES = {'total_count': 'total_prizes', 'claimed_count': 'prizes_claimed'}
+
 
 class DataProcessor:
     """
@@ -21,137 +30,180 @@ class DataProcessor:
         # Store reference in both variable names for compatibility
         self.neo4j_connector = neo4j_connector
 
-    def get_all_games(self):
+    def get_all_games_and_prizes(self):
         """
-        Get all games data as a DataFrame
+        Get games, prizes, combined data and games to avoid from a single query
+
+        The rows are fetched once and sliced client-side into the four DataFrames
 
         Returns:
         --------
-        pandas.DataFrame
-            DataFrame containing all games
+        tuple
+            Tuple of (games, prizes, combined, games_to_avoid) DataFrames
         """
-        games_data = self.connector.get_games()
-        if not games_data:
-            return pd.DataFrame()
+        records = self.connector.get_all_games_and_prizes() if hasattr(
+            self.connector, 'get_all_games_and_prizes') else []
+        if not records:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-        df = pd.DataFrame(games_data)
+        df = pd.DataFrame.from_records(records)
 
-        # Convert date fields if they exist
-        date_columns = ['start_date', 'end_date', 'last_updated']
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col])
+        # One row per game; games without a game_id cannot have details and appear only once
+        games_mask = ~df.duplicated('game_id') | df['game_id'].isna()
+        games = df.loc[games_mask, ['game_id', 'game_name', 'ticket_price', 'last_updated',
+                                    'game_close_date', 'total_prizes', 'prizes_claimed']]
 
-        # Ensure numeric types for price
-        if 'ticket_price' in df.columns:
-            df['ticket_price'] = pd.to_numeric(
-                df['ticket_price'], errors='coerce')
+        details = df[df['has_detail'].astype(bool)]
 
-        return df
+        # Prize rows carry the Detail node counts and remaining count
+        prizes = pd.DataFrame({
+            'game_id': details['game_id'],
+            'prize_level': details['prize_level'],
+            'total_prizes': details['detail_total_prizes'],
+            'prizes_claimed': details['detail_prizes_claimed'],
+            'remaining_count': details['detail_remaining_count']
+        })
+
+        combined = details[['game_id', 'game_name', 'ticket_price', 'prize_level',
+                            'total_prizes', 'prizes_claimed', 'last_updated',
+                            'game_close_date', 'remaining_count']]
 
-    def get_all_prizes(self):
+        games_to_avoid = self._select_games_to_avoid(details)
+
+        return (self._prepare_games(games),
+                self._prepare_prizes(prizes) if not prizes.empty else pd.DataFrame(),
+                self._prepare_combined(combined) if not combined.empty else pd.DataFrame(),
+                self._prepare_games_to_avoid(games_to_avoid) if not games_to_avoid.empty else pd.DataFrame())
+
+    def _select_games_to_avoid(self, details):
         """
-        Get all prizes data as a DataFrame
+        Select the top prize rows that are 90% or more claimed
+
+        Parameters:
+        -----------
+        details : pandas.DataFrame
+            Rows of get_all_games_and_prizes that have a Detail node
 
         Returns:
         --------
         pandas.DataFrame
-            DataFrame containing all prizes
+            Games to avoid ordered by claim rate, highest first
         """
-        prizes_data = self.connector.get_prize_details() if hasattr(
-            self.connector, 'get_prize_details') else []
-        if not prizes_data:
-            return pd.DataFrame()
+        prize_level = pd.to_numeric(details['prize_level'], errors='coerce')
+        total_prizes = pd.to_numeric(details['detail_total_prizes'], errors='coerce')
+        prizes_claimed = pd.to_numeric(details['detail_prizes_claimed'], errors='coerce')
+
+        claim_rate = prizes_claimed.astype(float) / total_prizes
+
+        games_to_avoid = pd.DataFrame({
+            'game_name': details['game_name'],
+            'game_id': details['game_id'],
+            'prize_level': details['prize_level'],
+            'ticket_price': details['ticket_price'],
+            'total_prizes': total_prizes,
+            'prizes_claimed': prizes_claimed,
+            'claim_rate': claim_rate
+        })
+
+        # The top prize of each game is its highest prize level. Rows whose level is not a
+        # number are skipped, the rest are ordered by level and only the first row of each
+        # game is kept, so a game whose top level is tied is counted once
+        ranked = prize_level.dropna().sort_values(ascending=False, kind='stable')
+        games_to_avoid = games_to_avoid.loc[ranked.index].drop_duplicates('game_id')
+        games_to_avoid = games_to_avoid[games_to_avoid['claim_rate'] >= 0.9]
+
+        return games_to_avoid.sort_values(
+            'claim_rate', ascending=False, kind='stable').head(500).reset_index(drop=True)
+
+    def _prepare_games(self, games_data):
+        """
+        Convert raw game records into the games DataFrame
 
-        df = pd.DataFrame(prizes_data)
+        Parameters:
+        -----------
+        games_data : list or pandas.DataFrame
+            Game records returned by the connector
 
-        # Ensure numeric types
-        numeric_columns = ['prize_level', 'total_count',
-                           'claimed_count', 'remaining_count']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        Returns:
+        --------
+        pandas.DataFrame
+            DataFrame containing all games
+        """
+        # Ensure numeric types for price
+        df = self._frame_from_records(games_data, ['ticket_price'])
 
-        # Add prize amount based on prize level if missing
-        # This is an estimation based on prize level, as actual amounts aren't in the schema
-        if 'prize_amount' not in df.columns and 'prize_level' in df.columns:
-            # Convert prize level to numeric, treating "1" as highest level
-            df['prize_amount'] = df['prize_level'].apply(
-                lambda x: float(10000/float(x)) if x and float(x) > 0 else 0
-            )
+        # Convert date fields if they exist, with an explicit format and a cache for repeated dates
+        date_columns = [col for col in ['start_date', 'end_date', 'last_updated']
+                        if col in df.columns]
+        if date_columns:
+            df[date_columns] = df[date_columns].apply(
+                pd.to_datetime, format='%m/%d/%Y', errors='coerce', cache=True)
 
         return df
 
-    def get_combined_data(self):
+    def _prepare_prizes(self, prizes_data):
         """
-        Get combined games and prizes data with additional calculated fields
+        Convert raw prize detail records into the prizes DataFrame
+
+        Parameters:
+        -----------
+        prizes_data : list or pandas.DataFrame
+            Prize detail records returned by the connector
 
         Returns:
         --------
         pandas.DataFrame
-            DataFrame with combined game and prize information
+            DataFrame containing all prizes
         """
-        combined_data = self.connector.get_games_with_prize_details() if hasattr(
-            self.connector, 'get_games_with_prize_details') else []
-        if not combined_data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(combined_data)
+        return self._ingest(prizes_data, ['prize_level', 'total_count',
+                                          'claimed_count', 'remaining_count'])
 
-        # Convert date fields if they exist
-        if 'last_updated' in df.columns:
-            df['last_updated'] = pd.to_datetime(
-                df['last_updated'], format='%m/%d/%Y', errors='coerce')
+    def _prepare_combined(self, combined_data):
+        """
+        Convert raw combined game and prize records into a DataFrame with calculated fields
 
-        # Ensure numeric types
-        numeric_columns = ['ticket_price', 'prize_level',
-                           'total_count', 'claimed_count', 'remaining_count']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        Parameters:
+        -----------
+        combined_data : list or pandas.DataFrame
+            Combined game and prize detail records returned by the connector
 
-        # Add prize amount based on prize level if missing
-        # This is an estimation based on prize level, as actual amounts aren't in the schema
-        if 'prize_amount' not in df.columns and 'prize_level' in df.columns:
-            # Convert prize level to numeric, treating "1" as highest level
-            df['prize_amount'] = df['prize_level'].apply(
-                lambda x: float(10000/float(x)) if x and float(x) > 0 else 0
-            )
+        Returns:
+        --------
+        pandas.DataFrame
+            DataFrame with combined game and prize information
+        """
+        df = self._ingest(combined_data, ['ticket_price', 'prize_level',
+                                'total_count', 'claimed_count', 'remaining_count'])
 
         # Calculate additional fields
         return self._calculate_additional_fields(df)
 
-    def get_games_to_avoid(self):
+    def _prepare_games_to_avoid(self, games_to_avoid):
         """
-        Get games where 90% or more of the top prizes have been claimed
+        Convert the selected games to avoid into the games to avoid DataFrame
+
+        Parameters:
+        -----------
+        games_to_avoid : pandas.DataFrame
+            Games to avoid rows chosen by _select_games_to_avoid
 
         Returns:
         --------
         pandas.DataFrame
             DataFrame containing games to avoid
         """
-        if hasattr(self.connector, 'get_games_to_avoid'):
-            games_to_avoid = self.connector.get_games_to_avoid()
-        else:
-            games_to_avoid = []
-
-        if not games_to_avoid:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(games_to_avoid)
-
-        # Ensure numeric types
+        # Ensure numeric types, without the count aliases the other frames carry
         numeric_columns = ['prize_level', 'ticket_price',
                            'total_prizes', 'prizes_claimed', 'claim_rate']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = games_to_avoid.assign(**{
+            col: self._to_numeric(games_to_avoid[col], col in COUNT_COLUMNS)
+            for col in numeric_columns if col in games_to_avoid.columns
+        })
 
         # Format game names to include game_id for disambiguation
         if all(col in df.columns for col in ['game_name', 'game_id']):
-            df['formatted_game_name'] = df.apply(
-                lambda row: f"{row['game_name']} ({row['game_id']})", axis=1
-            )
+            df['formatted_game_name'] = df['game_name'].astype(str) + \
+                ' (' + df['game_id'].astype(str) + ')'
 
         return df
 
@@ -188,30 +240,127 @@ class DataProcessor:
         if not filtered_data:
             return pd.DataFrame()
 
-        df = pd.DataFrame(filtered_data)
+        df = self._ingest(filtered_data, ['ticket_price', 'prize_level',
+                                'total_count', 'claimed_count', 'remaining_count'])
+
+        # Calculate additional fields
+        return self._calculate_additional_fields(df)
+
+    def _ingest(self, records, numeric_columns, date_format='%m/%d/%Y'):
+        """
+        Build a prize-level DataFrame from query records
+
+        Numeric columns are converted, last_updated is parsed and prize_amount is derived,
+        which is the shared ingest step for prizes, combined and filtered data
+
+        Parameters:
+        -----------
+        records : list or pandas.DataFrame
+            List of record dictionaries returned by the connector, or a DataFrame sliced from them
+        numeric_columns : list
+            Columns to convert to numeric types if they exist
+        date_format : str, optional
+            Format of the last_updated strings
+
+        Returns:
+        --------
+        pandas.DataFrame
+            DataFrame ready for analysis
+        """
+        df = self._frame_from_records(records, numeric_columns)
+
+        # Game ids and names repeat on every prize row, so store them as categories
+        for col in ['game_id', 'game_name']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
 
         # Convert date fields if they exist
         if 'last_updated' in df.columns:
             df['last_updated'] = pd.to_datetime(
-                df['last_updated'], format='%m/%d/%Y', errors='coerce')
-
-        # Ensure numeric types
-        numeric_columns = ['ticket_price', 'prize_level',
-                           'total_count', 'claimed_count', 'remaining_count']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df['last_updated'], format=date_format, errors='coerce', cache=True)
 
         # Add prize amount based on prize level if missing
-        # This is an estimation based on prize level, as actual amounts aren't in the schema
-        if 'prize_amount' not in df.columns and 'prize_level' in df.columns:
-            # Convert prize level to numeric, treating "1" as highest level
-            df['prize_amount'] = df['prize_level'].apply(
-                lambda x: float(10000/float(x)) if x and float(x) > 0 else 0
-            )
+        self._ensure_prize_amount(df)
 
-        # Calculate additional fields
-        return self._calculate_additional_fields(df)
+        return df
+
+    def _frame_from_records(self, records, numeric_columns):
+        """
+        Build a DataFrame from query records and convert its numeric columns in one step
+
+        Parameters:
+        -----------
+        records : list or pandas.DataFrame
+            List of record dictionaries returned by the connector, or a DataFrame sliced from them
+        numeric_columns : list
+            Columns to convert to numeric types if they exist
+
+        Returns:
+        --------
+        pandas.DataFrame
+            DataFrame with count aliases added and numeric columns converted
+        """
+        df = records if isinstance(
+            records, pd.DataFrame) else pd.DataFrame.from_records(records)
+
+        # Add the count aliases that the query no longer returns
+        df = df.assign(**{
+            alias: df[col] for alias, col in COUNT_ALIASES.items()
+            if col in df.columns and alias not in df.columns
+        })
+
+        # Convert all numeric columns together with a single assign
+        return df.assign(**{
+            col: self._to_numeric(df[col], col in COUNT_COLUMNS)
+            for col in numeric_columns if col in df.columns
+        })
+
+    def _to_numeric(self, values, is_count=False):
+        """
+        Convert a column to a numeric type
+
+        Parameters:
+        -----------
+        values : pandas.Series
+            Column to convert, invalid values become NaN
+        is_count : bool, optional
+            Whether the column holds prize counts, which are stored as int64 when none are missing
+
+        Returns:
+        --------
+        pandas.Series
+            Converted column
+        """
+        if not is_count:
+            return pd.to_numeric(values, errors='coerce')
+
+        # downcast only yields integers when no value is missing or fractional, and the
+        # result is widened back to int64 so sums cannot overflow a narrow integer type
+        numeric = pd.to_numeric(values, errors='coerce', downcast='integer')
+        if numeric.dtype.kind in 'iu':
+            numeric = numeric.astype('int64')
+
+        return numeric
+
+    def _ensure_prize_amount(self, df):
+        """
+        Add an estimated prize_amount column based on prize_level if it is missing
+
+        This is an estimation based on prize level, as actual amounts aren't in the schema
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            DataFrame with prize data, modified in place
+        """
+        if 'prize_amount' in df.columns or 'prize_level' not in df.columns:
+            return
+
+        # Convert prize level to numeric, treating "1" as highest level
+        prize_level = pd.to_numeric(df['prize_level'], errors='coerce').to_numpy()
+        has_level = prize_level > 0
+        df['prize_amount'] = np.where(
+            has_level, 10000.0 / np.where(has_level, prize_level, 1.0), 0.0)
 
     def _calculate_additional_fields(self, df):
         """
@@ -232,34 +381,48 @@ class DataProcessor:
 
         # Format game names to include game_id for disambiguation if both columns exist
         if all(col in df.columns for col in ['game_name', 'game_id']):
-            df['formatted_game_name'] = df.apply(
-                lambda row: f"{row['game_name']} ({row['game_id']})", axis=1
-            )
+            df['formatted_game_name'] = df['game_name'].astype(str) + \
+                ' (' + df['game_id'].astype(str) + ')'
+
+        # Prize-level rows are aggregated by game, in which case only the summed counts survive
+        need_agg = 'game_id' in df.columns and len(
+            df) > df['game_id'].nunique(dropna=False)
+
+        # Derive the count, probability and value columns from NumPy arrays and assign them together
+        derived = {}
+        remaining_count = df['remaining_count'].to_numpy(
+        ) if 'remaining_count' in df.columns else None
+        win_probability = df['win_probability'].to_numpy(
+        ) if 'win_probability' in df.columns else None
 
         # First, make sure remaining_count is calculated properly from total and claimed
         if all(col in df.columns for col in ['total_count', 'claimed_count']):
             # Recalculate remaining count directly
-            df['remaining_count'] = df['total_count'] - df['claimed_count']
+            remaining_count = df['total_count'].to_numpy() - \
+                df['claimed_count'].to_numpy()
+            derived['remaining_count'] = remaining_count
 
             # Calculate unclaimed prizes (same as remaining count)
-            df['unclaimed_prizes'] = df['remaining_count']
-
-        # Calculate win probability
-        if all(col in df.columns for col in ['remaining_count', 'total_count']):
-            # Avoid division by zero
-            df['win_probability'] = np.where(
-                df['remaining_count'] > 0,
-                df['remaining_count'] / df['total_count'],
-                0
-            )
+            derived['unclaimed_prizes'] = remaining_count
+
+        # Per-row probability and expected value would be discarded by the aggregation
+        if not need_agg:
+            # Calculate win probability
+            if remaining_count is not None and 'total_count' in df.columns:
+                # Games without remaining prizes or tickets have a probability of 0
+                win_probability = calculate_probability_array(
+                    remaining_count, df['total_count'].to_numpy())
+                derived['win_probability'] = win_probability
+
+            # Calculate expected value
+            if win_probability is not None and all(col in df.columns for col in ['prize_amount', 'ticket_price']):
+                derived['expected_value'] = calculate_expected_value_array(
+                    win_probability, df['prize_amount'].to_numpy(), df['ticket_price'].to_numpy())
 
-        # Calculate expected value
-        if all(col in df.columns for col in ['win_probability', 'prize_amount', 'ticket_price']):
-            df['expected_value'] = df['win_probability'] * \
-                df['prize_amount'] - df['ticket_price']
+        df = df.assign(**derived)
 
         # Aggregate prize data by game if necessary
-        if 'game_id' in df.columns and len(df) > len(df['game_id'].unique()):
+        if need_agg:
             agg_dict = {
                 'game_name': 'first',
                 'ticket_price': 'first',
@@ -274,16 +437,36 @@ class DataProcessor:
             if 'formatted_game_name' in df.columns:
                 agg_dict['formatted_game_name'] = 'first'
 
-            game_aggregates = df.groupby('game_id').agg(agg_dict).reset_index()
+            # Sort once so each game's rows are contiguous, then reduce every block with NumPy
+            # Rows without a game_id are dropped, as groupby would
+            sorted_df = df[df['game_id'].notna()].sort_values(
+                'game_id', kind='stable')
+            game_ids = sorted_df['game_id'].to_numpy()
+            # Start offset of each game's block (the slice keeps this empty when there are no rows)
+            starts = np.flatnonzero(
+                np.concatenate(([True], game_ids[1:] != game_ids[:-1])))[:len(game_ids)]
+
+            # 'first' values are taken as Series so categorical columns keep their dtype
+            game_aggregates = {'game_id': sorted_df['game_id'].iloc[starts].reset_index(drop=True)}
+            for col, func in agg_dict.items():
+                if col not in sorted_df.columns:
+                    continue
+                if func == 'first':
+                    game_aggregates[col] = sorted_df[col].iloc[starts].reset_index(drop=True)
+                elif func == 'sum':
+                    # Missing counts add nothing, matching pandas' NaN-skipping sum
+                    game_aggregates[col] = np.add.reduceat(
+                        np.nan_to_num(sorted_df[col].to_numpy()), starts)
+                elif func == 'max':
+                    # fmax ignores NaT, matching pandas' NaN-skipping max
+                    game_aggregates[col] = np.fmax.reduceat(
+                        sorted_df[col].to_numpy(), starts)
+            game_aggregates = pd.DataFrame(game_aggregates)
 
             # Calculate aggregated win probability and expected value
             if 'remaining_count' in game_aggregates.columns and 'total_count' in game_aggregates.columns:
-                game_aggregates['win_probability'] = np.where(
-                    game_aggregates['total_count'] > 0,
-                    game_aggregates['remaining_count'] /
-                    game_aggregates['total_count'],
-                    0
-                )
+                game_aggregates['win_probability'] = calculate_probability_array(
+                    game_aggregates['remaining_count'], game_aggregates['total_count'])
 
             # Expected value calculation would need prize amount information which is lost in aggregation
             # We'll need to calculate it differently or omit it from the aggregated data
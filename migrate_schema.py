@@ -0,0 +1,98 @@
+"""
+One-off maintenance for the Neo4j database behind the dashboard
+
+Creates the constraint and indexes that the dashboard's lookups benefit from, and
+normalizes stored property types left by older data loads. The dashboard only reads
+and does not depend on this having run, its queries cast values as they read them.
+Run it with a user that has write and schema privileges, for example after a data load:
+
+    NEO4J_URI=... NEO4J_USERNAME=... NEO4J_PASSWORD=... python migrate_schema.py
+"""
+import os
+import sys
+from neo4j import GraphDatabase
+
+# Every statement is idempotent, so the script can be run again after each data load
+# The property updates commit in batches rather than in one transaction over every node
+STATEMENTS = [
+    "CREATE CONSTRAINT game_num IF NOT EXISTS FOR (g:Game) REQUIRE g.game_number IS UNIQUE",
+    "CREATE INDEX detail_game IF NOT EXISTS FOR (d:Detail) ON (d.game_number)",
+    # Placeholder close dates become null; the dashboard still treats them as missing
+    # when they reappear, so this only tidies the stored data
+    """MATCH (g:Game) WHERE g.game_close_date IN ['', 'None', 'null']
+    CALL {
+        WITH g
+        SET g.game_close_date = null
+    } IN TRANSACTIONS OF 10000 ROWS""",
+    # Numbers stored as strings are converted, values that do not convert are left as they are
+    """MATCH (g:Game)
+    CALL {
+        WITH g
+        SET g.ticket_price = coalesce(toFloat(g.ticket_price), g.ticket_price),
+            g.total_prizes = coalesce(toInteger(g.total_prizes), g.total_prizes),
+            g.prizes_claimed = coalesce(toInteger(g.prizes_claimed), g.prizes_claimed)
+    } IN TRANSACTIONS OF 10000 ROWS""",
+    """MATCH (d:Detail)
+    CALL {
+        WITH d
+        SET d.prize_level = coalesce(toInteger(d.prize_level), d.prize_level),
+            d.total_prizes = coalesce(toInteger(d.total_prizes), d.total_prizes),
+            d.prizes_claimed = coalesce(toInteger(d.prizes_claimed), d.prizes_claimed)
+    } IN TRANSACTIONS OF 10000 ROWS"""
+]
+
+
+def migrate(driver, database=None):
+    """
+    Run every maintenance statement against the database
+
+    Each statement runs on its own so one failure, such as duplicate game numbers
+    preventing the constraint, does not skip the others
+
+    Parameters:
+    -----------
+    driver : neo4j.Driver
+        Driver connected as a user with write and schema privileges
+    database : str, optional
+        Name of the database to update, the server's default database if None
+
+    Returns:
+    --------
+    bool
+        True if every statement succeeded, False otherwise
+    """
+    succeeded = True
+    with driver.session(database=database) as session:
+        for statement in STATEMENTS:
+            try:
+                # Auto-commit transactions, which CALL ... IN TRANSACTIONS requires
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"Schema update error: {str(e)}")
+                succeeded = False
+    return succeeded
+
+
+def main():
+    """
+    Run the maintenance with the same environment variables as the dashboard
+
+    Returns:
+    --------
+    int
+        Exit status, 0 if every statement succeeded
+    """
+    driver = GraphDatabase.driver(
+        os.environ.get("NEO4J_URI", ""),
+        auth=(os.environ.get("NEO4J_USERNAME", ""),
+              os.environ.get("NEO4J_PASSWORD", ""))
+    )
+    try:
+        succeeded = migrate(driver, os.environ.get("NEO4J_DATABASE") or None)
+    finally:
+        driver.close()
+    return 0 if succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,142 @@
+import copy
+import logging
 import os
-from neo4j import GraphDatabase
+import threading
+from cachetools import TTLCache
+from neo4j import GraphDatabase, READ_ACCESS, RoutingControl
 from neo4j.exceptions import ServiceUnavailable, AuthError
 
+logger = logging.getLogger(__name__)
+
+# Drivers are shared by every connector with the same URI and credentials,
+# keyed by (uri, username, password); the lock makes the lookup and creation atomic
+_DRIVER_CACHE = {}
+_DRIVER_LOCK = threading.Lock()
+
+# Cypher statements are module constants, built once at import and identical on every call
+_GAMES_QUERY = """
+    MATCH (g:Game)
+    RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price, 
+           g.date_updated AS last_updated, g.game_close_date AS game_close_date,
+           g.total_prizes AS total_prizes, g.prizes_claimed AS prizes_claimed
+"""
+
+_PRIZE_DETAILS_QUERY = """
+    MATCH (d:Detail)
+    RETURN d.game_number AS game_id, d.prize_level AS prize_level, 
+           d.total_prizes AS total_prizes, d.prizes_claimed AS prizes_claimed,
+           coalesce(toInteger(d.total_prizes), 0) - coalesce(toInteger(d.prizes_claimed), 0) AS remaining_count
+"""
+
+# Neo4j sorts nulls first in descending order, so prize levels that do not convert sort last
+_GAME_PRIZE_DETAILS_QUERY = """
+    MATCH (g:Game {game_number: $game_id})<-[:BELONGS_TO]-(d:Detail)
+    WITH g, d, toInteger(d.prize_level) AS prize_level,
+         toInteger(d.total_prizes) AS detail_total_prizes,
+         toInteger(d.prizes_claimed) AS detail_prizes_claimed
+    RETURN g.game_name AS game_name, g.ticket_price AS ticket_price,
+           prize_level, d.prize_level AS prize_amount,
+           g.total_prizes AS total_prizes, g.prizes_claimed AS prizes_claimed, 
+           detail_total_prizes, detail_prizes_claimed,
+           coalesce(toInteger(g.total_prizes), 0) - coalesce(toInteger(g.prizes_claimed), 0) AS remaining_count
+    ORDER BY prize_level IS NULL, prize_level DESC
+"""
+
+_GAMES_WITH_PRIZE_DETAILS_QUERY = """
+    MATCH (g:Game)<-[:BELONGS_TO]-(d:Detail)
+    RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price,
+           d.prize_level AS prize_level, 
+           g.total_prizes AS total_prizes, g.prizes_claimed AS prizes_claimed, 
+           g.date_updated AS last_updated, g.game_close_date AS game_close_date,
+           coalesce(toInteger(g.total_prizes), 0) - coalesce(toInteger(g.prizes_claimed), 0) AS remaining_count
+"""
+
+_ALL_GAMES_AND_PRIZES_QUERY = """
+    MATCH (g:Game)
+    OPTIONAL MATCH (g)<-[:BELONGS_TO]-(d:Detail)
+    RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price,
+           g.date_updated AS last_updated, g.game_close_date AS game_close_date,
+           g.total_prizes AS total_prizes, g.prizes_claimed AS prizes_claimed,
+           d IS NOT NULL AS has_detail, d.prize_level AS prize_level,
+           d.total_prizes AS detail_total_prizes, d.prizes_claimed AS detail_prizes_claimed,
+           coalesce(toInteger(g.total_prizes), 0) - coalesce(toInteger(g.prizes_claimed), 0) AS remaining_count,
+           coalesce(toInteger(d.total_prizes), 0) - coalesce(toInteger(d.prizes_claimed), 0) AS detail_remaining_count
+"""
+
+# The query text is the same for every filter combination so Neo4j can reuse its plan,
+# a None parameter or an ending filter other than 'only' or 'exclude' disables that condition
+# Game nodes are filtered first so that only matching games are joined to their Detail nodes
+_FILTERED_GAMES_QUERY = """
+    MATCH (g:Game)
+    WHERE ($game_id IS NULL OR g.game_number = $game_id)
+    AND ($min_ticket_price IS NULL OR toFloat(g.ticket_price) >= $min_ticket_price)
+    AND ($max_ticket_price IS NULL OR toFloat(g.ticket_price) <= $max_ticket_price)
+    AND (NOT $ending_filter IN ['only', 'exclude']
+         OR ($ending_filter = 'only'
+             AND g.game_close_date IS NOT NULL AND NOT g.game_close_date IN ['', 'None', 'null'])
+         OR ($ending_filter = 'exclude'
+             AND (g.game_close_date IS NULL OR g.game_close_date IN ['', 'None', 'null'])))
+    MATCH (g)<-[:BELONGS_TO]-(d:Detail)
+    RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price,
+           d.prize_level AS prize_level, 
+           g.total_prizes AS total_prizes, g.prizes_claimed AS prizes_claimed,
+           g.date_updated AS last_updated, g.game_close_date AS game_close_date,
+           coalesce(toInteger(g.total_prizes), 0) - coalesce(toInteger(g.prizes_claimed), 0) AS remaining_count
+"""
+
+
+def _get_driver(uri, username, password):
+    """
+    Get the process-wide driver for a URI and credentials, creating it on first use
+    
+    Parameters:
+    -----------
+    uri : str
+        The URI for the Neo4j Bolt endpoint
+    username : str
+        Neo4j username
+    password : str
+        Neo4j password
+        
+    Returns:
+    --------
+    neo4j.Driver
+        Driver with its own connection pool
+    """
+    # Key on the password too, so changed credentials never reuse a driver built with the old ones
+    key = (uri, username, password)
+    # Hold the lock from lookup to insert so concurrent first calls create only one driver
+    with _DRIVER_LOCK:
+        driver = _DRIVER_CACHE.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(
+                uri,
+                auth=(username, password),
+                max_connection_pool_size=50,
+                connection_acquisition_timeout=60,
+                max_connection_lifetime=3600
+            )
+            _DRIVER_CACHE[key] = driver
+    return driver
+
+
+def close_all():
+    """
+    Close every shared driver, for use at shutdown
+    """
+    with _DRIVER_LOCK:
+        drivers = list(_DRIVER_CACHE.values())
+        _DRIVER_CACHE.clear()
+    for driver in drivers:
+        driver.close()
+
+
 class Neo4jConnector:
     """
     Class to handle connections and queries to a Neo4j database via the Bolt protocol
     """
     
-    def __init__(self, uri, username, password):
+    def __init__(self, uri, username, password, database=None):
         """
         Initialize the connector with connection parameters
         
@@ -19,15 +148,22 @@ class Neo4jConnector:
             Neo4j username
         password : str
             Neo4j password
+        database : str, optional
+            Name of the database to query, the server's default database if None
         """
         self.uri = uri
         self.username = username
         self.password = password
+        self.database = database
         self.driver = None
         
-        # Try to establish the driver connection
+        # Recent query results keyed by (query, params), shared by every thread using this connector
+        self._cache = TTLCache(maxsize=128, ttl=60)
+        self._cache_lock = threading.Lock()
+        
+        # Reuse the shared driver for this URI and credentials, creating it if needed
         try:
-            self.driver = GraphDatabase.driver(uri, auth=(username, password))
+            self.driver = _get_driver(uri, username, password)
         except Exception as e:
             print(f"Driver initialization error: {str(e)}")
     
@@ -45,7 +181,7 @@ class Neo4jConnector:
             
         try:
             # Verify connectivity by running a simple query
-            with self.driver.session() as session:
+            with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
                 result = session.run("RETURN 1 AS test")
                 record = result.single()
                 return record and record["test"] == 1
@@ -56,6 +192,13 @@ class Neo4jConnector:
             print(f"Unexpected error during connection test: {str(e)}")
             return False
     
+    def invalidate(self):
+        """
+        Clear the cached query results, so that the next queries read from the database
+        """
+        with self._cache_lock:
+            self._cache.clear()
+    
     def execute_query(self, query, params=None):
         """
         Execute a Cypher query against the Neo4j database
@@ -84,28 +227,47 @@ class Neo4jConnector:
         if not self.driver:
             print("Driver not initialized. Check connection parameters.")
             return empty_result
+        
+        # Serve repeated queries from the cache, parameters that cannot be hashed skip it
+        try:
+            cache_key = (query, tuple(sorted(params.items())))
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+        
+        if cache_key is not None:
+            with self._cache_lock:
+                cached = self._cache.get(cache_key)
+            if cached is not None:
+                # Return a copy so callers cannot modify the cached rows
+                return copy.deepcopy(cached)
             
         try:
-            with self.driver.session() as session:
-                result = session.run(query, params)
-                
-                # Collect columns
-                columns = result.keys()
-                
-                # Collect data rows
-                data = []
-                for record in result:
-                    row = []
-                    for column in columns:
-                        row.append(record[column])
-                    data.append(row)
-                
-                # Format the result as a dictionary similar to the REST API format
-                # This maintains compatibility with the existing code
-                return {
-                    'columns': columns,
-                    'data': data
-                }
+            # The driver manages the session and transaction, retrying transient failures
+            # and routing the read to any cluster member
+            records, _, columns = self.driver.execute_query(
+                query,
+                parameters_=params,
+                database_=self.database,
+                routing_=RoutingControl.READ
+            )
+            
+            # Collect data rows, Record.values() already returns a new list in column order
+            data = [record.values() for record in records]
+            
+            # Format the result as a dictionary similar to the REST API format
+            # This maintains compatibility with the existing code
+            result = {
+                'columns': columns,
+                'data': data
+            }
+            
+            # Only successful results are cached, so errors are retried on the next call
+            if cache_key is not None:
+                with self._cache_lock:
+                    self._cache[cache_key] = copy.deepcopy(result)
+            
+            return result
         except Exception as e:
             print(f"Query execution error: {str(e)}")
             # Return empty result instead of raising exception to avoid app crashes
@@ -114,8 +276,14 @@ class Neo4jConnector:
     def close(self):
         """
         Close the Neo4j driver connection
+        
+        The driver is shared, so it is also removed from the cache for later connectors
         """
         if self.driver:
+            key = (self.uri, self.username, self.password)
+            with _DRIVER_LOCK:
+                if _DRIVER_CACHE.get(key) is self.driver:
+                    del _DRIVER_CACHE[key]
             self.driver.close()
     
     def get_games(self):
@@ -127,24 +295,16 @@ class Neo4jConnector:
         list
             List of game dictionaries
         """
-        query = """
-        MATCH (g:Game)
-        RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price, 
-               g.date_updated AS last_updated, g.game_close_date AS game_close_date,
-               g.total_prizes AS total_prizes, g.total_prizes AS total_count, 
-               g.prizes_claimed AS prizes_claimed, g.prizes_claimed AS claimed_count
-        """
-        
-        result = self.execute_query(query)
+        result = self.execute_query(_GAMES_QUERY)
         
         if 'data' not in result:
             return []
             
         games = []
-        columns = result['columns']
+        columns = tuple(result['columns'])
         
         for row in result['data']:
-            game_dict = {columns[i]: value for i, value in enumerate(row)}
+            game_dict = dict(zip(columns, row))
             games.append(game_dict)
             
         return games
@@ -158,29 +318,13 @@ class Neo4jConnector:
         list
             List of prize detail dictionaries
         """
-        query = """
-        MATCH (d:Detail)
-        RETURN d.game_number AS game_id, d.prize_level AS prize_level, 
-               d.total_prizes AS total_prizes, d.total_prizes AS total_count, 
-               d.prizes_claimed AS prizes_claimed, d.prizes_claimed AS claimed_count
-        """
-        
-        result = self.execute_query(query)
+        result = self.execute_query(_PRIZE_DETAILS_QUERY)
         
         if 'data' not in result:
             return []
             
-        prizes = []
-        columns = result['columns']
-        
-        for row in result['data']:
-            prize_dict = {columns[i]: value for i, value in enumerate(row)}
-            # Calculate remaining count with None handling
-            if 'total_count' in prize_dict and 'claimed_count' in prize_dict:
-                total_count = 0 if prize_dict['total_count'] is None else prize_dict['total_count']
-                claimed_count = 0 if prize_dict['claimed_count'] is None else prize_dict['claimed_count']
-                prize_dict['remaining_count'] = total_count - claimed_count
-            prizes.append(prize_dict)
+        columns = tuple(result['columns'])
+        prizes = [dict(zip(columns, row)) for row in result['data']]
             
         return prizes
     
@@ -195,47 +339,30 @@ class Neo4jConnector:
             
         Returns:
         --------
-        list
-            List of prize detail dictionaries for the specified game
-        """
-        # Add debugging information
-        print(f"Looking up game_prize_details for game_id: {game_id}")
-        
-        query = """
-        MATCH (g:Game), (d:Detail)
-        WHERE g.game_number = d.game_number AND g.game_number = $game_id
-        RETURN g.game_name AS game_name, g.ticket_price AS ticket_price,
-               d.prize_level AS prize_level, d.prize_level AS prize_amount,
-               g.total_prizes AS total_prizes, g.total_prizes AS total_count,
-               g.prizes_claimed AS prizes_claimed, g.prizes_claimed AS claimed_count, 
-               d.total_prizes AS detail_total_count, d.total_prizes AS detail_total_prizes,
-               d.prizes_claimed AS detail_claimed_count, d.prizes_claimed AS detail_prizes_claimed
-        ORDER BY toInteger(d.prize_level) DESC
+        dict
+            Dictionary mapping each column name to its list of values for the specified game,
+            which pandas can turn into a DataFrame one column at a time
         """
+        # Add debugging information, formatted only when debug logging is enabled
+        logger.debug("Looking up game_prize_details for game_id: %s", game_id)
         
         params = {'game_id': game_id}
-        result = self.execute_query(query, params)
+        result = self.execute_query(_GAME_PRIZE_DETAILS_QUERY, params)
         
         # Debug the query result
-        print(f"Query result for game {game_id}: data length = {len(result['data']) if 'data' in result else 'No data'}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Query result for game %s: data length = %s", game_id,
+                         len(result['data']) if 'data' in result else 'No data')
         
-        if 'data' not in result:
-            return []
+        if 'data' not in result or not result['data']:
+            return {}
             
-        prizes = []
+        # Transpose the rows into one list per column
         columns = result['columns']
-        
-        for row in result['data']:
-            prize_dict = {columns[i]: value for i, value in enumerate(row)}
-            # Calculate remaining count with None handling
-            if 'total_count' in prize_dict and 'claimed_count' in prize_dict:
-                total_count = 0 if prize_dict['total_count'] is None else prize_dict['total_count']
-                claimed_count = 0 if prize_dict['claimed_count'] is None else prize_dict['claimed_count']
-                prize_dict['remaining_count'] = total_count - claimed_count
-            prizes.append(prize_dict)
+        prizes = {column: list(values) for column, values in zip(columns, zip(*result['data']))}
         
         # Debug the result we're returning
-        print(f"Returning {len(prizes)} prize entries for game {game_id}")
+        logger.debug("Returning %d prize entries for game %s", len(result['data']), game_id)
         
         return prizes
     
@@ -248,70 +375,38 @@ class Neo4jConnector:
         list
             List of dictionaries containing game and prize detail information
         """
-        query = """
-        MATCH (g:Game), (d:Detail)
-        WHERE g.game_number = d.game_number
-        RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price,
-               d.prize_level AS prize_level, 
-               g.total_prizes AS total_prizes, g.total_prizes AS total_count, 
-               g.prizes_claimed AS prizes_claimed, g.prizes_claimed AS claimed_count, 
-               g.date_updated AS last_updated, g.game_close_date AS game_close_date
-        """
-        
-        result = self.execute_query(query)
+        result = self.execute_query(_GAMES_WITH_PRIZE_DETAILS_QUERY)
         
         if 'data' not in result:
             return []
             
-        combined_data = []
-        columns = result['columns']
-        
-        for row in result['data']:
-            data_dict = {columns[i]: value for i, value in enumerate(row)}
-            # Calculate remaining count with None handling
-            if 'total_count' in data_dict and 'claimed_count' in data_dict:
-                total_count = 0 if data_dict['total_count'] is None else data_dict['total_count']
-                claimed_count = 0 if data_dict['claimed_count'] is None else data_dict['claimed_count']
-                data_dict['remaining_count'] = total_count - claimed_count
-            combined_data.append(data_dict)
+        columns = tuple(result['columns'])
+        combined_data = [dict(zip(columns, row)) for row in result['data']]
             
         return combined_data
     
-    def get_games_to_avoid(self):
+    def get_all_games_and_prizes(self):
         """
-        Get games where 90% or more of the top prizes have been claimed
+        Get games and their prize details from a single query
+        
+        Games without Detail nodes are returned once with has_detail set to False, so the
+        result covers the games, prize details and combined data in one round trip
         
         Returns:
         --------
         list
-            List of games to avoid with their information
-        """
-        query = """
-        MATCH (g:Game)<-[:BELONGS_TO]-(d:Detail)
-        WITH g, max(toInteger(d.prize_level)) AS max_prize_level
-        MATCH (g)<-[:BELONGS_TO]-(d:Detail)
-        WHERE toInteger(d.prize_level) = max_prize_level 
-        AND (toFloat(d.prizes_claimed) / d.total_prizes) >= 0.9
-        RETURN g.game_name AS game_name, g.game_number AS game_id, 
-               d.prize_level AS prize_level, g.ticket_price AS ticket_price,
-               d.total_prizes AS total_prizes, d.prizes_claimed AS prizes_claimed, 
-               (toFloat(d.prizes_claimed) / d.total_prizes) AS claim_rate
+            List of dictionaries containing game and prize detail information
         """
-        
-        result = self.execute_query(query)
+        result = self.execute_query(_ALL_GAMES_AND_PRIZES_QUERY)
         
         if 'data' not in result:
             return []
             
-        games_to_avoid = []
-        columns = result['columns']
-        
-        for row in result['data']:
-            game_dict = {columns[i]: value for i, value in enumerate(row)}
-            games_to_avoid.append(game_dict)
+        columns = tuple(result['columns'])
+        combined_data = [dict(zip(columns, row)) for row in result['data']]
             
-        return games_to_avoid
-        
+        return combined_data
+    
     def get_filtered_games(self, game_id=None, min_ticket_price=1, max_ticket_price=100, ending_filter='include'):
         """
         Get filtered games and prizes based on criteria
@@ -332,60 +427,20 @@ class Neo4jConnector:
         list
             Filtered list of game and prize data
         """
-        query_parts = [
-            "MATCH (g:Game), (d:Detail)",
-            "WHERE g.game_number = d.game_number"
-        ]
-        
-        params = {}
-        
-        if game_id:
-            query_parts.append("AND g.game_number = $game_id")
-            params['game_id'] = game_id
-        
-        # Add ticket price filter
-        if min_ticket_price is not None or max_ticket_price is not None:
-            if min_ticket_price is not None:
-                query_parts.append("AND toFloat(g.ticket_price) >= $min_ticket_price")
-                params['min_ticket_price'] = float(min_ticket_price)
-            
-            if max_ticket_price is not None:
-                query_parts.append("AND toFloat(g.ticket_price) <= $max_ticket_price")
-                params['max_ticket_price'] = float(max_ticket_price)
-        
-        # Add game_close_date filter based on ending_filter parameter
-        if ending_filter != 'include':
-            if ending_filter == 'only':
-                # Only show games ending soon - with a valid non-null, non-empty game_close_date
-                query_parts.append("AND g.game_close_date IS NOT NULL AND g.game_close_date <> '' AND g.game_close_date <> 'None' AND g.game_close_date <> 'null'")
-            elif ending_filter == 'exclude':
-                # Exclude games ending soon - only show games without valid game_close_date
-                query_parts.append("AND (g.game_close_date IS NULL OR g.game_close_date = '' OR g.game_close_date = 'None' OR g.game_close_date = 'null')")
-            
-        query_parts.append("""
-        RETURN g.game_number AS game_id, g.game_name AS game_name, g.ticket_price AS ticket_price,
-               d.prize_level AS prize_level, 
-               g.total_prizes AS total_prizes, g.total_prizes AS total_count, 
-               g.prizes_claimed AS prizes_claimed, g.prizes_claimed AS claimed_count, 
-               g.date_updated AS last_updated, g.game_close_date AS game_close_date
-        """)
+        # Every parameter is always passed, even when it disables its condition
+        params = {
+            'game_id': game_id or None,
+            'min_ticket_price': float(min_ticket_price) if min_ticket_price is not None else None,
+            'max_ticket_price': float(max_ticket_price) if max_ticket_price is not None else None,
+            'ending_filter': ending_filter
+        }
         
-        query = " ".join(query_parts)
-        result = self.execute_query(query, params)
+        result = self.execute_query(_FILTERED_GAMES_QUERY, params)
         
         if 'data' not in result:
             return []
             
-        filtered_data = []
-        columns = result['columns']
-        
-        for row in result['data']:
-            data_dict = {columns[i]: value for i, value in enumerate(row)}
-            # Calculate remaining count with None handling
-            if 'total_count' in data_dict and 'claimed_count' in data_dict:
-                total_count = 0 if data_dict['total_count'] is None else data_dict['total_count']
-                claimed_count = 0 if data_dict['claimed_count'] is None else data_dict['claimed_count']
-                data_dict['remaining_count'] = total_count - claimed_count
-            filtered_data.append(data_dict)
+        columns = tuple(result['columns'])
+        filtered_data = [dict(zip(columns, row)) for row in result['data']]
             
         return filtered_data
\ No newline at end of file
@@ -1,4 +1,12 @@
+import math
+import re
 import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# "YYYY-MM-DD to YYYY-MM-DD", with optional whitespace around each date
+_DATE_RANGE_RE = re.compile(
+    r'^\s*(\d{4}-\d{2}-\d{2})\s*to\s*(\d{4}-\d{2}-\d{2})\s*$')
 
 
 def format_currency(value):
@@ -15,9 +23,9 @@ def format_currency(value):
     str
         Formatted currency string with comma separators
     """
-    # Handle NaN values
-    if np.isnan(value):
-        return "$0.00"
+    # Integers need neither the NaN check nor the float conversion
+    if isinstance(value, int):
+        return f"${value:,}"
 
     # Convert to float if needed
     try:
@@ -26,10 +34,59 @@ def format_currency(value):
         # If conversion fails, return original value with $ sign
         return f"${value}"
 
+    # Handle NaN values
+    if math.isnan(value):
+        return "$0.00"
+
     # Format with comma separator, no cents
     return f"${value:,.0f}"
 
 
+def format_currency_series(values):
+    """
+    Format a Series of numeric values as currency with comma separators
+
+    Produces the same strings as format_currency with numpy.char instead of a Python call per row
+
+    Parameters:
+    -----------
+    values : pandas.Series
+        The numeric values to format
+
+    Returns:
+    --------
+    pandas.Series
+        Series of formatted currency strings with comma separators
+    """
+    numeric = np.asarray(pd.to_numeric(values, errors='coerce'), dtype=np.float64)
+    missing = ~np.isfinite(numeric)
+    amounts = np.round(np.where(missing, 0, numeric))
+    whole = np.abs(amounts).astype(np.int64)
+
+    # numpy.char has no thousands separator, so build the digits three at a time
+    # from the lowest group up, prefixing a zero-padded ",ddd" while a higher group remains
+    top = whole % 1000
+    tail = np.full(len(whole), '', dtype='<U1')
+    rest = whole // 1000
+    while rest.any():
+        higher = rest > 0
+        tail = np.where(higher, np.char.add(np.char.mod(',%03d', top), tail), tail)
+        top = np.where(higher, rest % 1000, top)
+        rest //= 1000
+
+    # The sign comes from the value before rounding, so -0.4 gives "$-0" as it does in Python
+    sign = np.where(np.signbit(numeric), '$-', '$')
+    formatted = np.char.add(sign, np.char.add(np.char.mod('%d', top), tail)).astype(object)
+
+    # NaN, infinite and non-numeric values are rare, format those few with format_currency
+    # so that they read exactly as it writes them ("$0.00", "$inf", the original text)
+    if missing.any():
+        originals = np.asarray(values, dtype=object)[missing]
+        formatted[missing] = [format_currency(value) for value in originals]
+
+    return pd.Series(formatted, index=getattr(values, 'index', None), dtype=object)
+
+
 def calculate_probability(remaining, total):
     """
     Calculate probability of winning
@@ -76,6 +133,66 @@ def calculate_expected_value(probability, prize_amount, ticket_price):
     return (probability * prize_amount) - ticket_price
 
 
+def calculate_probability_array(remaining, total):
+    """
+    Calculate probabilities of winning for arrays of prize counts
+
+    Vectorized counterpart of calculate_probability
+
+    Parameters:
+    -----------
+    remaining : array-like
+        Numbers of remaining prizes
+    total : array-like
+        Total numbers of tickets
+
+    Returns:
+    --------
+    numpy.ndarray
+        Probability values between 0 and 1, 0 where either count is not positive
+        and NaN where either count is missing
+    """
+    remaining = np.asarray(remaining, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+
+    # Skip the division only where a count is not positive, the same test as the scalar
+    # helper; NaN fails both comparisons, so missing counts divide to NaN as they do there
+    probability = np.zeros(np.broadcast(remaining, total).shape)
+    np.divide(remaining, total, out=probability,
+              where=~((total <= 0) | (remaining <= 0)))
+    return probability
+
+
+def calculate_expected_value_array(probability, prize_amount, ticket_price):
+    """
+    Calculate expected values of lottery tickets for arrays of inputs
+
+    Vectorized counterpart of calculate_expected_value
+
+    Parameters:
+    -----------
+    probability : array-like
+        Probabilities of winning (between 0 and 1)
+    prize_amount : array-like
+        Prize amounts in dollars
+    ticket_price : array-like
+        Ticket prices in dollars
+
+    Returns:
+    --------
+    numpy.ndarray
+        Expected values in dollars, the lost ticket price where the probability is not
+        positive and NaN where any input is missing
+    """
+    probability = np.asarray(probability, dtype=np.float64)
+    prize_amount = np.asarray(prize_amount, dtype=np.float64)
+    ticket_price = np.asarray(ticket_price, dtype=np.float64)
+
+    # A missing probability fails the comparison, so NaN inputs carry through the
+    # arithmetic to the result instead of being reported as a lost ticket price
+    return np.where(probability <= 0, -ticket_price, probability * prize_amount - ticket_price)
+
+
 def parse_date_range(date_range_str):
     """
     Parse a date range string into a tuple of datetime objects
@@ -90,15 +207,18 @@ def parse_date_range(date_range_str):
     tuple
         Tuple of (start_date, end_date) as datetime objects
     """
-    from datetime import datetime
+    if not date_range_str:
+        return None
 
-    if not date_range_str or 'to' not in date_range_str:
+    match = _DATE_RANGE_RE.match(date_range_str)
+    if not match:
         return None
 
     try:
-        parts = date_range_str.split('to')
-        start_date = datetime.strptime(parts[0].strip(), '%Y-%m-%d')
-        end_date = datetime.strptime(parts[1].strip(), '%Y-%m-%d')
+        # Both dates are strict YYYY-MM-DD, which fromisoformat parses without a format string
+        start_date = datetime.fromisoformat(match.group(1))
+        end_date = datetime.fromisoformat(match.group(2))
         return (start_date, end_date)
-    except Exception:
+    except ValueError:
+        # Well-formed but impossible dates, such as 2022-02-30
         return None
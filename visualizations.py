@@ -1,8 +1,50 @@
+import logging
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from utils import format_currency
+from utils import format_currency_series
+
+logger = logging.getLogger(__name__)
+
+# Columns that hold Game node attributes, repeated on each prize-level row of a game
+GAME_LEVEL_COLUMNS = ['claimed_count', 'total_count', 'ticket_price',
+                      'expected_value', 'win_probability', 'game_close_date']
+
+# Layout settings shared across renders, built once rather than per figure
+# Horizontal legend above the top right corner of the plot
+_LEGEND_TOP = dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+# Axis with ticks formatted as whole percentages
+_PERCENT_XAXIS = dict(tickformat='.0%')
+
+
+def _top_k_indices(values, k, descending=True):
+    """
+    Get the positions of the k largest (or smallest) values, in sorted order
+
+    Partially sorts with argpartition so only the selected values are fully sorted
+
+    Parameters:
+    -----------
+    values : numpy.ndarray
+        Values to rank, NaN ranks last
+    k : int
+        Number of positions to return
+    descending : bool, optional
+        Whether to rank from largest to smallest (default True)
+
+    Returns:
+    --------
+    numpy.ndarray
+        Positions of the top k values, best first
+    """
+    keys = -values if descending else values
+    k = min(k, len(keys))
+    if 0 < k < len(keys):
+        positions = np.argpartition(keys, k - 1)[:k]
+    else:
+        positions = np.arange(len(keys))[:k]
+    return positions[np.argsort(keys[positions], kind='stable')]
 
 
 class Visualizations:
@@ -21,6 +63,95 @@ class Visualizations:
         """
         self.data = data
 
+        # Column names looked up by every chart's precheck
+        self._columns = frozenset(data.columns)
+
+        # Number of distinct games, counted once for the prize-level check and chart titles
+        self._n_unique_games = data['game_name'].nunique() if 'game_name' in data.columns else 0
+
+        # Game-level attributes (counts, price, expected value, probability, close date) repeat
+        # on every prize-level row of a game, so reduce to one row per game once here and let
+        # every chart slice from it instead of repeating the same groupby
+        self._game_level = data
+        if not data.empty and 'game_name' in data.columns and len(data) > self._n_unique_games:
+            # Group by game_id when present so different games sharing a name stay apart,
+            # keeping game_name as an attribute; first() takes each column's first non-null
+            # value, so a prize row missing the close date does not hide the game's date
+            key = 'game_id' if 'game_id' in data.columns else 'game_name'
+            columns = [col for col in ['game_name'] + GAME_LEVEL_COLUMNS
+                       if col in data.columns and col != key]
+            self._game_level = data.groupby(
+                key, sort=False, observed=True)[columns].first().reset_index()
+        self._has_prize_levels = self._game_level is not data
+
+        # Integer game codes for self.data and the names they stand for,
+        # built on first use by _get_game_codes
+        self._game_codes = None
+        self._game_code_names = None
+
+        # Timeline figure, built on first use by create_simulated_timeline; the data is
+        # never modified, so it stays valid for the life of the instance
+        self._timeline_figure = None
+
+    @staticmethod
+    def _empty_figure(message):
+        """
+        Create an empty figure carrying a message in place of a chart
+
+        Parameters:
+        -----------
+        message : str
+            Text to display in the figure
+
+        Returns:
+        --------
+        plotly.graph_objects.Figure
+            Plotly figure with only the message annotation
+        """
+        fig = go.Figure()
+        fig.add_annotation(
+            text=message,
+            showarrow=False,
+            font=dict(size=16)
+        )
+        return fig
+
+    def _get_game_codes(self):
+        """
+        Get an integer code per row of the data identifying its game
+
+        Returns:
+        --------
+        numpy.ndarray
+            Code of each row's game_name, -1 where the name is missing
+        """
+        if self._game_codes is None:
+            # Hash the game names once; later lookups compare integers instead of strings
+            self._game_codes, self._game_code_names = pd.factorize(
+                self.data['game_name'])
+        return self._game_codes
+
+    def _game_mask(self, game_name):
+        """
+        Get a boolean mask of the data rows belonging to a game
+
+        Parameters:
+        -----------
+        game_name : str
+            Name of the game to select
+
+        Returns:
+        --------
+        numpy.ndarray
+            True for each row whose game_name equals game_name
+        """
+        codes = self._get_game_codes()
+        # Look the name up once among the distinct names, then compare integer codes per row
+        code = self._game_code_names.get_indexer([game_name])[0]
+        if code < 0:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == code
+
     def create_prize_availability_chart(self, limit=20, games_ending_filter='include'):
         """
         Create a chart showing prize availability by game
@@ -37,18 +168,12 @@ class Visualizations:
         plotly.graph_objects.Figure
             Plotly figure for prize availability
         """
-        if self.data.empty or not all(col in self.data.columns for col in ['game_name']):
+        if self.data.empty or 'game_name' not in self._columns:
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for prize availability chart",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
+            return self._empty_figure("No data available for prize availability chart")
 
-        # Prepare data for stacked bar chart
-        chart_data = self.data.copy()
+        # Prepare data for stacked bar chart, one row per game
+        chart_data = self._game_level
 
         # Apply ending soon filter based on game_close_date column
         # This is the only column that contains end date information in the database
@@ -60,55 +185,31 @@ class Visualizations:
                 # Exclude games ending soon
                 chart_data = chart_data[chart_data['game_close_date'].isna()]
 
-        # Group by game if there are multiple prize levels per game, making sure to use Game-level prize data
-        if len(chart_data) > len(chart_data['game_name'].unique()):
+        # With multiple prize levels per game, use the Game node's claimed_count and total_count
+        # taken in __init__ (not the sum across all Detail nodes)
+        if self._has_prize_levels:
             # Make sure required columns are present
             if all(col in chart_data.columns for col in ['claimed_count', 'total_count']):
-                # For each game, take the first row's claimed_count and total_count as they should come from the Game node
-                # (not the sum across all Detail nodes)
-                agg_dict = {
-                    # Take first occurrence (from Game node)
-                    'claimed_count': 'first',
-                    # Take first occurrence (from Game node)
-                    'total_count': 'first',
-                    'ticket_price': 'first'    # Keep ticket price info
-                }
-
-                # Include game_close_date column if it exists in the data
-                if 'game_close_date' in chart_data.columns:
-                    agg_dict['game_close_date'] = 'first'
-
-                # Aggregate at the game level
-                chart_data = chart_data.groupby(
-                    'game_name').agg(agg_dict).reset_index()
-
                 # Calculate remaining count - for each game this is total prizes minus claimed prizes
-                chart_data['remaining_count'] = chart_data['total_count'] - \
-                    chart_data['claimed_count']
+                # Subtract the raw arrays, both columns share the same rows so no alignment is needed
+                chart_data = chart_data.assign(
+                    remaining_count=chart_data['total_count'].to_numpy() - chart_data['claimed_count'].to_numpy())
             else:
                 # If data is missing, return empty figure
-                fig = go.Figure()
-                fig.add_annotation(
-                    text="Data missing required columns for prize availability calculation",
-                    showarrow=False,
-                    font=dict(size=16)
-                )
-                return fig
-
-        # Sort by remaining count for better visualization
-        chart_data = chart_data.sort_values('remaining_count', ascending=False)
-
-        # Limit the number of games to display
-        if len(chart_data) > limit:
-            chart_data = chart_data.head(limit)
-
-        # Create stacked bar chart
+                return self._empty_figure("Data missing required columns for prize availability calculation")
+
+        # Sort by remaining count for better visualization, limiting the number of games to display
+        chart_data = chart_data.iloc[_top_k_indices(
+            chart_data['remaining_count'].to_numpy(dtype=np.float64), limit)]
+
+        # Create stacked bar chart from plain arrays, which plotly takes without converting a Series
+        game_names = chart_data['game_name'].to_numpy()
         fig = go.Figure()
 
         # First add claimed prizes (red)
         fig.add_trace(go.Bar(
-            y=chart_data['game_name'],
-            x=chart_data['claimed_count'],
+            y=game_names,
+            x=chart_data['claimed_count'].to_numpy(),
             name='Claimed Prizes',
             orientation='h',
             marker_color='red',
@@ -117,8 +218,8 @@ class Visualizations:
 
         # Then add remaining prizes (green)
         fig.add_trace(go.Bar(
-            y=chart_data['game_name'],
-            x=chart_data['remaining_count'],
+            y=game_names,
+            x=chart_data['remaining_count'].to_numpy(),
             name='Remaining Prizes',
             orientation='h',
             marker_color='green',
@@ -127,7 +228,7 @@ class Visualizations:
 
         # Update layout
         title_text = 'Prize Availability by Game'
-        if limit < len(self.data['game_name'].unique()):
+        if limit < self._n_unique_games:
             title_text += f' (Top {limit})'
 
         if games_ending_filter == 'only':
@@ -140,13 +241,7 @@ class Visualizations:
             title=title_text,
             xaxis_title='Number of Prizes',
             yaxis_title='Game',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
+            legend=_LEGEND_TOP,
             # Adjust height based on number of games
             height=max(500, 25 * len(chart_data))
         )
@@ -165,47 +260,20 @@ class Visualizations:
         plotly.graph_objects.Figure
             Plotly figure for expected value
         """
-        if self.data.empty or 'expected_value' not in self.data.columns or 'game_name' not in self.data.columns:
+        if self.data.empty or not {'game_name', 'expected_value'}.issubset(self._columns):
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for expected value chart",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
-
-        # Prepare data for bar chart
-        chart_data = self.data.copy()
-
-        # Group by game and use Game-level attributes if there are multiple prize levels per game
-        if len(chart_data) > len(chart_data['game_name'].unique()):
-            agg_dict = {
-                'expected_value': 'first',  # Use Game-level expected value rather than mean
-                'ticket_price': 'first'     # To include in hover data
-            }
-
-            # Include prize counts if available
-            if 'claimed_count' in chart_data.columns:
-                # Take Game node's claimed count
-                agg_dict['claimed_count'] = 'first'
-            if 'total_count' in chart_data.columns:
-                # Take Game node's total count
-                agg_dict['total_count'] = 'first'
-
-            chart_data = chart_data.groupby(
-                'game_name').agg(agg_dict).reset_index()
-
-        # Sort by expected value
-        chart_data = chart_data.sort_values('expected_value', ascending=False)
-
-        # Limit to top 10 games if there are many
-        if len(chart_data) > 10:
-            chart_data = chart_data.head(10)
-
-        # Format expected value for display
-        chart_data['formatted_ev'] = chart_data['expected_value'].apply(
-            format_currency)
+            return self._empty_figure("No data available for expected value chart")
+
+        # Prepare data for bar chart, using Game-level expected value rather than mean
+        chart_data = self._game_level
+
+        # Sort by expected value, limiting to top 10 games if there are many
+        chart_data = chart_data.iloc[_top_k_indices(
+            chart_data['expected_value'].to_numpy(dtype=np.float64), 10)]
+
+        # Format expected value for display, vectorized over the column
+        chart_data = chart_data.assign(
+            formatted_ev=format_currency_series(chart_data['expected_value']))
 
         # Create bar chart
         fig = px.bar(
@@ -224,7 +292,7 @@ class Visualizations:
         if 'ticket_price' in chart_data.columns:
             hover_template = "%{y}<br>Expected Value: %{x:$.2f}<br>Ticket Price: $%{customdata:.2f}"
             fig.update_traces(
-                customdata=chart_data['ticket_price'], hovertemplate=hover_template)
+                customdata=chart_data['ticket_price'].to_numpy(dtype=np.float32), hovertemplate=hover_template)
 
         # Update layout
         fig.update_layout(
@@ -258,37 +326,47 @@ class Visualizations:
         plotly.graph_objects.Figure
             Plotly figure for prize distribution
         """
-        if self.data.empty or not all(col in self.data.columns for col in ['game_name', 'prize_amount']):
+        if self.data.empty or not {'game_name', 'prize_amount'}.issubset(self._columns):
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for prize distribution chart",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
-
-        # Prepare data
-        chart_data = self.data.copy()
-
-        # Select top games by number of prize levels or total prize value
-        top_games = chart_data.groupby(
-            'game_name')['prize_amount'].sum().nlargest(5).index.tolist()
-        chart_data = chart_data[chart_data['game_name'].isin(top_games)]
-
-        # Create box plot to show prize distribution
-        fig = px.box(
-            chart_data,
-            x='game_name',
-            y='prize_amount',
-            color='game_name',
-            points='all',
-            labels={'prize_amount': 'Prize Amount ($)', 'game_name': 'Game'},
-            title='Prize Distribution by Game'
-        )
+            return self._empty_figure("No data available for prize distribution chart")
+
+        # Select top games by total prize value, summing per game code with bincount
+        codes = self._get_game_codes()
+        valid = codes >= 0
+        prize_amounts = self.data['prize_amount'].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        totals = np.bincount(
+            codes[valid], weights=np.nan_to_num(prize_amounts[valid]))
+        if len(totals) > 5:
+            top_codes = np.argpartition(-totals, 4)[:5]
+        else:
+            top_codes = np.arange(len(totals))
+        chart_data = self.data[np.isin(codes, top_codes)]
+
+        # Summarize each game's prize amounts here so the browser receives five numbers per
+        # game (min, quartiles, max) instead of every prize row
+        quantiles = chart_data.groupby('game_name', observed=True, sort=False)[
+            'prize_amount'].quantile([0.0, 0.25, 0.5, 0.75, 1.0]).unstack()
+
+        # Create box plot to show prize distribution, one trace per game so each gets its own color
+        fig = go.Figure()
+        for name, (low, q1, median, q3, high) in zip(quantiles.index, quantiles.to_numpy()):
+            fig.add_trace(go.Box(
+                x=[name],
+                q1=[q1],
+                median=[median],
+                q3=[q3],
+                lowerfence=[low],
+                upperfence=[high],
+                name=str(name),
+                boxpoints=False
+            ))
 
         # Format y-axis as currency
         fig.update_layout(
+            title='Prize Distribution by Game',
+            xaxis_title='Game',
+            yaxis_title='Prize Amount ($)',
             yaxis=dict(
                 tickprefix='$',
                 type='log',  # Use log scale for better visibility of different prize levels
@@ -307,47 +385,20 @@ class Visualizations:
         plotly.graph_objects.Figure
             Plotly figure for winning probability
         """
-        if self.data.empty or not all(col in self.data.columns for col in ['game_name', 'win_probability']):
+        if self.data.empty or not {'game_name', 'win_probability'}.issubset(self._columns):
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for probability chart",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
-
-        # Prepare data
-        chart_data = self.data.copy()
-
-        # Group by game if there are multiple prize levels per game
-        if len(chart_data) > len(chart_data['game_name'].unique()):
-            agg_dict = {
-                'win_probability': 'first',  # Use Game-level probability rather than mean
-                'ticket_price': 'first'      # For additional context
-            }
-
-            # Include prize counts if available
-            if 'claimed_count' in chart_data.columns:
-                # Take Game node's claimed count
-                agg_dict['claimed_count'] = 'first'
-            if 'total_count' in chart_data.columns:
-                # Take Game node's total count
-                agg_dict['total_count'] = 'first'
-
-            chart_data = chart_data.groupby(
-                'game_name').agg(agg_dict).reset_index()
-
-        # Sort by probability
-        chart_data = chart_data.sort_values('win_probability', ascending=False)
-
-        # Limit to top games if there are many
-        if len(chart_data) > 10:
-            chart_data = chart_data.head(10)
-
-        # Format probability for display (as percentage)
-        chart_data['formatted_prob'] = chart_data['win_probability'].apply(
-            lambda x: f"{x:.2%}")
+            return self._empty_figure("No data available for probability chart")
+
+        # Prepare data, using Game-level probability rather than mean
+        chart_data = self._game_level
+
+        # Sort by probability, limiting to top games if there are many
+        chart_data = chart_data.iloc[_top_k_indices(
+            chart_data['win_probability'].to_numpy(dtype=np.float64), 10)]
+
+        # Format probability for display (as percentage), same output as "{:.2%}" in one numpy.char call
+        chart_data = chart_data.assign(formatted_prob=np.char.mod(
+            '%.2f%%', chart_data['win_probability'].to_numpy(dtype=np.float64) * 100))
 
         # Create horizontal bar chart
         fig = px.bar(
@@ -366,14 +417,14 @@ class Visualizations:
         if 'ticket_price' in chart_data.columns:
             hover_template = "%{y}<br>Win Probability: %{x:.2%}<br>Ticket Price: $%{customdata:.2f}"
             fig.update_traces(
-                customdata=chart_data['ticket_price'], hovertemplate=hover_template)
+                customdata=chart_data['ticket_price'].to_numpy(dtype=np.float32), hovertemplate=hover_template)
 
         # Update layout
         fig.update_layout(
             xaxis_title='Win Probability',
             yaxis_title='Game',
             coloraxis_showscale=False,
-            xaxis=dict(tickformat='.0%')  # Format x-axis ticks as percentages
+            xaxis=_PERCENT_XAXIS  # Format x-axis ticks as percentages
         )
 
         return fig
@@ -382,6 +433,23 @@ class Visualizations:
         """
         Create a timeline chart showing games ending soon based on game_close_date
 
+        End dates are simulated deterministically from ticket price and percentage of prizes claimed.
+        The figure is built once per instance and later calls return a copy of it
+
+        Returns:
+        --------
+        plotly.graph_objects.Figure
+            Plotly figure showing a timeline of games ending
+        """
+        if self._timeline_figure is None:
+            self._timeline_figure = self._build_simulated_timeline()
+        # Return a copy so that a caller updating its figure does not change later ones
+        return go.Figure(self._timeline_figure)
+
+    def _build_simulated_timeline(self):
+        """
+        Build the timeline chart returned by create_simulated_timeline
+
         Returns:
         --------
         plotly.graph_objects.Figure
@@ -389,96 +457,50 @@ class Visualizations:
         """
         if self.data.empty:
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for timeline",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
-
-        # Get a clean copy of the data for our timeline
-        chart_data = self.data.copy()
-
-        # Filter to only include games with a non-null or non-empty game_close_date
+            return self._empty_figure("No data available for timeline")
+
+        # Filter every row of the data on its own close date; the filter below returns
+        # a new frame and new columns are added with assign, so no copy is needed
+        chart_data = self.data
+
+        # Debug information to help troubleshoot, only formatted when debug logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug and all(col in chart_data.columns for col in ["game_name", "game_close_date"]):
+            logger.debug("Available game_close_date values:\n%s",
+                         chart_data[["game_name", "game_close_date"]].to_string())
+
+        # Build one mask for every row to drop and index once
+        keep = np.ones(len(chart_data), dtype=bool)
+
+        # Only include games with a non-null, non-blank game_close_date, handling the
+        # different spellings of an empty value
         if "game_close_date" in chart_data.columns:
-            # Make sure to handle different types of empty values
-            chart_data = chart_data[
-                chart_data["game_close_date"].notna() &
-                (chart_data["game_close_date"] != "") &
-                (chart_data["game_close_date"] != "None") &
-                (chart_data["game_close_date"] != "null")
-            ]
+            close_dates = chart_data["game_close_date"]
+            # Strip every value in one numpy.char pass rather than pandas' per-element str path
+            stripped = np.char.strip(close_dates.to_numpy().astype(str))
+            keep &= ~(close_dates.isna().to_numpy() |
+                      np.isin(stripped, ["", "None", "null"]))
 
         # Explicitly exclude problematic games from showing in the timeline chart
         if "game_name" in chart_data.columns:
-            chart_data = chart_data[
-                (chart_data["game_name"] != "Texas Loteria") &
-                (chart_data["game_name"] != "7")
-            ]
+            keep &= ~chart_data["game_name"].isin(
+                {"Texas Loteria", "7"}).to_numpy()
 
-        # Add debug information to help troubleshoot
-        print("\n=== TIMELINE CHART DEBUGGING ===")
-        print(
-            f"Total games before filtering: {len(chart_data) if not chart_data.empty else 0}")
+        chart_data = chart_data[keep]
 
-        if "game_close_date" in chart_data.columns:
-            # Check what game_close_date values we have
-            print("\nAvailable game_close_date values:")
-            for idx, (name, close_date) in enumerate(zip(chart_data["game_name"], chart_data["game_close_date"])):
-                print(f"{idx+1}. {name}: '{close_date}' (Type: {type(close_date)})")
-
-            # Make sure to filter out games with no valid close date
-            # First, convert all empty strings, "None", "null" to actual None values
-            chart_data.loc[chart_data["game_close_date"]
-                           == "", "game_close_date"] = None
-            chart_data.loc[chart_data["game_close_date"]
-                           == "None", "game_close_date"] = None
-            chart_data.loc[chart_data["game_close_date"]
-                           == "null", "game_close_date"] = None
-
-            # Then filter on not null
-            chart_data = chart_data[chart_data["game_close_date"].notna()]
-
-            # Print after filtering
-            print(
-                f"\nGames after filtering non-null game_close_date: {len(chart_data)}")
-            if not chart_data.empty and "game_name" in chart_data.columns:
-                print("Remaining games:")
-                for idx, (name, close_date) in enumerate(zip(chart_data["game_name"], chart_data["game_close_date"])):
-                    print(f"{idx+1}. {name}: '{close_date}'")
-
-        # If we still have too many games, let's limit to only games with non-empty strings
-        if "game_close_date" in chart_data.columns and len(chart_data) > 12:
-            chart_data = chart_data[chart_data["game_close_date"].astype(
-                str).str.strip() != ""]
-            print(f"\nGames after filtering empty strings: {len(chart_data)}")
-            if not chart_data.empty and "game_name" in chart_data.columns:
-                print("Remaining games:")
-                for idx, (name, close_date) in enumerate(zip(chart_data["game_name"], chart_data["game_close_date"])):
-                    print(f"{idx+1}. {name}: '{close_date}'")
+        if debug and all(col in chart_data.columns for col in ["game_name", "game_close_date"]):
+            logger.debug("Games after filtering game_close_date: %d\n%s",
+                         len(chart_data), chart_data[["game_name", "game_close_date"]].to_string())
 
         # If no games with close date, return empty figure
         if chart_data.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No games ending soon to display",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
+            return self._empty_figure("No games ending soon to display")
 
         # We need game_name and ticket_price
         required_columns = ['game_name', 'ticket_price']
         if not all(col in chart_data.columns for col in required_columns):
             # Return empty figure if required columns are missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="Missing required data for timeline",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
+            return self._empty_figure("Missing required data for timeline")
 
         # Get today's date for the reference line
         today = pd.Timestamp.now().normalize()
@@ -488,21 +510,21 @@ class Visualizations:
         # Higher claimed percentages suggest the game might end sooner
 
         # Make sure we have numeric ticket prices
-        chart_data['ticket_price'] = pd.to_numeric(
-            chart_data['ticket_price'], errors='coerce')
+        chart_data = chart_data.assign(ticket_price=pd.to_numeric(
+            chart_data['ticket_price'], errors='coerce'))
 
         # Calculate a popularity factor based on the percentage of prizes claimed
         if all(col in chart_data.columns for col in ['claimed_count', 'total_count']):
             # Calculate percentage claimed
-            chart_data['percent_claimed'] = chart_data['claimed_count'] / \
+            percent_claimed = chart_data['claimed_count'] / \
                 chart_data['total_count'] * 100
             # Fill any NaN values with 50%
-            chart_data['percent_claimed'] = chart_data['percent_claimed'].fillna(
-                50)
+            chart_data = chart_data.assign(
+                percent_claimed=percent_claimed.fillna(50))
         else:
-            # No claim data, assign a random percentage between 30-70%
-            chart_data['percent_claimed'] = np.random.uniform(
-                30, 70, size=len(chart_data))
+            # No claim data, assume 50% like a game with unknown counts so the
+            # same data always produces the same timeline
+            chart_data = chart_data.assign(percent_claimed=50.0)
 
         # Simulate an end date:
         # - Base duration of 180 days (about 6 months)
@@ -510,42 +532,38 @@ class Visualizations:
         # - Higher claimed percentages reduce the duration
 
         # Normalize ticket prices to 0-1 scale for consistent calculations
-        max_price = chart_data['ticket_price'].max()
+        prices = chart_data['ticket_price'].to_numpy(dtype=np.float64)
+        max_price = np.nanmax(prices) if np.isfinite(prices).any() else 0
         if max_price > 0:
-            price_factor = chart_data['ticket_price'] / max_price
+            # Games without a valid ticket price get the same default factor as a missing maximum
+            price_factor = np.nan_to_num(prices / max_price, nan=0.5)
         else:
             price_factor = 0.5  # Default if no valid ticket prices
 
-        # Calculate days until game end
+        # Calculate days until game end on the raw arrays
         # Base duration + price adjustment - claimed percentage adjustment
-        chart_data['days_until_end'] = (
+        days_until_end = np.trunc(
             180 +  # Base duration of 6 months
             (180 * price_factor) -  # Higher prices get longer duration
             # Higher claimed percent shortens duration
-            (chart_data['percent_claimed'] * 1.5)
-        ).astype(int)
+            (chart_data['percent_claimed'].to_numpy(dtype=np.float64) * 1.5)
+        )
 
         # Ensure minimum of 30 days and maximum of 365 days
-        chart_data['days_until_end'] = chart_data['days_until_end'].clip(
-            30, 365)
-
-        # Calculate the end date
-        chart_data['simulated_end_date'] = today + \
-            pd.to_timedelta(chart_data['days_until_end'], unit='D')
+        chart_data = chart_data.assign(days_until_end=np.clip(
+            days_until_end, 30, 365).astype(np.int32))
 
         # Ensure each game has a unique position on the y-axis
-        # Sort by simulated end date, with earliest ending games at the top
-        chart_data = chart_data.sort_values('days_until_end')
-
-        # Only keep top 20 games to avoid overcrowding
-        if len(chart_data) > 20:
-            chart_data = chart_data.head(20)
+        # Sort by simulated end date, with earliest ending games at the top,
+        # and only keep top 20 games to avoid overcrowding
+        chart_data = chart_data.iloc[_top_k_indices(
+            chart_data['days_until_end'].to_numpy(dtype=np.float64), 20, descending=False)]
 
         # We need to use bar chart instead of timeline because of column name requirements
-        # Create a bar chart to show game timeline
-        chart_data['duration'] = (
-            # in days
-            chart_data['simulated_end_date'] - today).dt.total_seconds() / (24 * 60 * 60)
+        # Create a bar chart to show game timeline, the bars run from today (0) to the
+        # simulated end date, which is a whole number of days away
+        chart_data = chart_data.assign(
+            duration=chart_data['days_until_end'].astype(np.float64))
 
         fig = px.bar(
             chart_data,
@@ -562,15 +580,10 @@ class Visualizations:
         )
 
         # Adjust the x-axis to show dates instead of days
-        date_ticks = []
-        date_labels = []
-
-        # Create 5 evenly spaced date ticks for x-axis
-        for i in range(6):
-            days = i * 60  # Every 60 days (2 months)
-            date_ticks.append(days)
-            date_labels.append(
-                (today + pd.Timedelta(days=days)).strftime('%b %d, %Y'))
+        # Create evenly spaced date ticks for x-axis, every 60 days (2 months) out to 300 days
+        date_ticks = np.arange(0, 301, 60)
+        date_labels = (today + pd.to_timedelta(date_ticks, unit='D')
+                       ).strftime('%b %d, %Y').tolist()
 
         fig.update_xaxes(
             tickvals=date_ticks,
@@ -625,35 +638,24 @@ class Visualizations:
         plotly.graph_objects.Figure
             Plotly figure for prize levels
         """
-        if self.data.empty or 'game_name' not in self.data.columns:
+        if self.data.empty or 'game_name' not in self._columns:
             # Return empty figure if data is missing
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No data available for prize level chart",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
+            return self._empty_figure("No data available for prize level chart")
 
         # Filter data for the specified game
-        game_data = self.data[self.data['game_name'] == game_name].copy()
+        game_data = self.data[self._game_mask(game_name)]
 
-        if game_data.empty or 'prize_amount' not in game_data.columns:
+        if game_data.empty or 'prize_amount' not in self._columns:
             # Return empty figure if no data for the game
-            fig = go.Figure()
-            fig.add_annotation(
-                text=f"No prize data available for {game_name}",
-                showarrow=False,
-                font=dict(size=16)
-            )
-            return fig
+            return self._empty_figure(f"No prize data available for {game_name}")
 
-        # Sort by prize amount
-        game_data = game_data.sort_values('prize_amount', ascending=False)
+        # Sort by prize amount, largest first
+        game_data = game_data.iloc[_top_k_indices(
+            game_data['prize_amount'].to_numpy(dtype=np.float64), len(game_data))]
 
         # Format prize amount for display
-        game_data['formatted_prize'] = game_data['prize_amount'].apply(
-            format_currency)
+        game_data = game_data.assign(
+            formatted_prize=format_currency_series(game_data['prize_amount']))
 
         # Create horizontal bar chart for prize levels
         fig = px.bar(